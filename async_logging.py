@@ -0,0 +1,228 @@
+"""
+Queue-backed logging, so the GUI thread never waits on log I/O.
+
+setup_logger() here wraps utils.logger.setup_logger: the logger it returns
+keeps its level (records below it are still discarded before any formatting)
+but its handlers are moved to a background writer thread. Records are put on
+a bounded queue and the writer formats and writes them in batches, flushing
+each file once per batch instead of once per record. Plain FileHandlers are
+swapped for size-bounded RotatingFileHandlers on the same file. When the
+queue is full new records are dropped and counted rather than blocking.
+
+    from async_logging import setup_logger, get_log_writer
+    logger = setup_logger('settings_screen')
+    logger.debug("Deferred widget: %s", name)   # formatted on the writer thread
+    get_log_writer().stats()                    # {'queue_depth': 0, 'dropped': 0, ...}
+
+Set CONTROLCENTER_LOG_FILE to additionally write every record reaching the
+root logger to a rotating file.
+"""
+import os
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from utils.logger import setup_logger as _setup_logger
+
+ENV_VAR = 'CONTROLCENTER_LOG_FILE'
+QUEUE_SIZE = 10000
+BATCH_SIZE = 200
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+
+_STOP = object()
+
+
+class _QueueHandler(logging.Handler):
+    """Puts records for a fixed set of handlers on the writer's queue."""
+    def __init__(self, writer, handlers):
+        super(_QueueHandler, self).__init__()
+        self.writer = writer
+        self.handlers = tuple(handlers)
+
+    def emit(self, record):
+        self.writer.enqueue(self.handlers, record)
+
+
+class LogWriter(object):
+    """
+    Background thread writing queued records to their handlers in batches.
+
+    Args:
+        maxsize (int): Records the queue holds before new ones are dropped.
+        batch_size (int): Most records written between two flushes; a batch is
+            whatever has queued up since the last one, up to this size.
+        max_bytes (int): Size at which routed log files are rotated.
+        backup_count (int): Rotated files kept per log.
+    """
+    def __init__(self, maxsize=QUEUE_SIZE, batch_size=BATCH_SIZE, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.max_depth = 0
+        self._queue = queue.Queue(maxsize)
+        self._rotating = {}
+        self._thread = None
+        self._lock = threading.RLock()
+
+    def start(self):
+        """Start the writer thread and route the root logger's handlers through it."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+                root = logging.getLogger()
+                log_file = os.environ.get(ENV_VAR)
+                if log_file:
+                    root.addHandler(self._rotating_handler(log_file, logging.Formatter(
+                        '%(asctime)s %(name)s %(levelname)s: %(message)s')))
+                self.route(root)
+        return self
+
+    def stop(self, timeout=5.0):
+        """Write everything still queued and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def stats(self):
+        """Return the writer's counters."""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'max_queue_depth': self.max_depth,
+            'dropped': self.dropped,
+            'written': self.written,
+            'batches': self.batches,
+        }
+
+    def route(self, logger):
+        """
+        Move a logger's handlers behind the queue (once).
+
+        Args:
+            logger (logging.Logger): The logger to route.
+
+        Returns:
+            logging.Logger: The same logger.
+        """
+        with self._lock:
+            if not logger.handlers or any(isinstance(handler, _QueueHandler) for handler in logger.handlers):
+                # Handler-less loggers reach the (routed) root logger by propagation
+                return logger
+            handlers = [self._bounded(handler) for handler in logger.handlers]
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+            logger.addHandler(_QueueHandler(self, handlers))
+        return logger
+
+    def enqueue(self, handlers, record):
+        """Queue a record for handlers (any thread); drops it when the queue is full."""
+        try:
+            self._queue.put_nowait((handlers, record))
+        except queue.Full:
+            self.dropped += 1
+            return
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _rotating_handler(self, path, formatter):
+        handler = self._rotating.get(path)
+        if handler is None:
+            handler = self._rotating[path] = logging.handlers.RotatingFileHandler(
+                path, maxBytes=self.max_bytes, backupCount=self.backup_count, delay=True)
+            handler.setFormatter(formatter)
+        return handler
+
+    def _bounded(self, handler):
+        """Replace an unbounded FileHandler with a rotating one on the same file."""
+        if type(handler) is logging.FileHandler:
+            rotating = self._rotating_handler(handler.baseFilename, handler.formatter)
+            rotating.setLevel(handler.level)
+            handler.close()
+            return rotating
+        return handler
+
+    def _run(self):
+        running = True
+        while running:
+            batch = []
+            item = self._queue.get()
+            while True:
+                if item is _STOP:
+                    running = False
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        touched = set()
+        for handlers, record in batch:
+            for handler in handlers:
+                if record.levelno < handler.level:
+                    continue
+                try:
+                    self._emit(handler, record)
+                    touched.add(handler)
+                except Exception:
+                    handler.handleError(record)
+            self.written += 1
+        for handler in touched:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+        self.batches += 1
+
+    @staticmethod
+    def _emit(handler, record):
+        if not isinstance(handler, logging.StreamHandler):
+            handler.handle(record)
+            return
+        if not handler.filter(record):
+            return
+        # Like StreamHandler.emit without its per-record flush
+        with handler.lock:
+            if isinstance(handler, logging.handlers.RotatingFileHandler) and handler.shouldRollover(record):
+                handler.doRollover()
+            if handler.stream is None:
+                handler.stream = handler._open()
+            handler.stream.write(handler.format(record) + handler.terminator)
+
+
+_writer = None
+
+
+def get_log_writer():
+    """Return the process-wide log writer, starting it if needed."""
+    global _writer
+    if _writer is None:
+        _writer = LogWriter().start()
+    return _writer
+
+
+def setup_logger(name):
+    """
+    Return utils.logger's logger for a name, with its output moved to the log writer.
+
+    Args:
+        name (str): The logger name.
+
+    Returns:
+        logging.Logger: The logger.
+    """
+    return get_log_writer().route(_setup_logger(name))
@@ -0,0 +1,163 @@
+import time
+import threading
+import subprocess
+from collections import namedtuple
+from PyQt5.QtCore import Qt, QObject, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar, QPushButton
+from async_logging import setup_logger
+from theme_engine import get_theme
+
+# Outcome of one step. status is "ok", "failed" or "cancelled"; exit_status is
+# the process exit code for shell steps, 0/1 for Python steps.
+StepResult = namedtuple('StepResult', ['name', 'status', 'exit_status', 'duration', 'error'])
+
+JobStep = namedtuple('JobStep', ['name', 'func'])
+
+
+class StepFailed(Exception):
+    """Raised by a step that did not succeed; carries the exit status and output."""
+    def __init__(self, message, exit_status=1, output=''):
+        super(StepFailed, self).__init__(message)
+        self.exit_status = exit_status
+        self.output = output
+
+
+def shell_step(name, args, timeout=120):
+    """
+    Create a step that runs a command and fails on a non-zero exit status.
+
+    Args:
+        name (str): Step name shown in the progress overlay.
+        args (list): The command and its arguments (no shell).
+        timeout (int): Seconds before the command is considered failed.
+
+    Returns:
+        JobStep: The step.
+    """
+    def run():
+        completed = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   universal_newlines=True, timeout=timeout)
+        if completed.returncode != 0:
+            output = completed.stdout.strip()
+            raise StepFailed(f"{' '.join(args)} exited with {completed.returncode}: {output}",
+                             completed.returncode, output)
+        return 0
+    return JobStep(name, run)
+
+
+class Job(QObject):
+    """
+    Runs a list of steps in a worker thread, reporting progress per step.
+
+    Cancellation takes effect between steps. Each step's duration and exit
+    status is recorded in results; a failed step stops the job unless
+    stop_on_failure is False.
+    """
+    # index of the step starting, total steps, step name
+    progress = pyqtSignal(int, int, str)
+    # StepResult
+    stepFinished = pyqtSignal(object)
+    # list of StepResult for every step that ran
+    finished = pyqtSignal(object)
+
+    def __init__(self, name, steps, stop_on_failure=True):
+        super(Job, self).__init__()
+        self.name = name
+        self.steps = list(steps)
+        self.stop_on_failure = stop_on_failure
+        self.results = []
+        self.logger = setup_logger('background_jobs')
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start running the steps in a worker thread."""
+        self._thread = threading.Thread(target=self._run, name=f'job-{self.name}', daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stop the job before its next step."""
+        self._cancel.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def failed_steps(self):
+        """Return the results of the steps that failed."""
+        return [result for result in self.results if result.status == 'failed']
+
+    def _run(self):
+        total = len(self.steps)
+        for index, step in enumerate(self.steps):
+            if self._cancel.is_set():
+                self.results.append(StepResult(step.name, 'cancelled', None, 0.0, None))
+                break
+            self.progress.emit(index, total, step.name)
+            start = time.monotonic()
+            try:
+                exit_status = step.func()
+                result = StepResult(step.name, 'ok', exit_status if isinstance(exit_status, int) else 0,
+                                    time.monotonic() - start, None)
+            except StepFailed as e:
+                result = StepResult(step.name, 'failed', e.exit_status, time.monotonic() - start, str(e))
+            except Exception as e:
+                result = StepResult(step.name, 'failed', 1, time.monotonic() - start, str(e))
+            self.results.append(result)
+            self.logger.info(f"Job {self.name}: step '{step.name}' {result.status} "
+                             f"in {result.duration:.2f}s (exit status {result.exit_status})")
+            self.stepFinished.emit(result)
+            if result.status == 'failed' and self.stop_on_failure:
+                break
+        self.progress.emit(total, total, "Done")
+        self.finished.emit(self.results)
+
+
+class JobProgressOverlay(QWidget):
+    """Overlay covering its parent that shows a job's step progress and a Cancel button."""
+    def __init__(self, parent, title):
+        super(JobProgressOverlay, self).__init__(parent)
+        self.setObjectName("jobProgressOverlay")
+        self.setAttribute(Qt.WA_StyledBackground, True)
+        theme = get_theme()
+        theme.apply(self, 'jobOverlay')
+
+        layout = QVBoxLayout(self)
+        layout.setAlignment(Qt.AlignCenter)
+        self.titleLabel = QLabel(title)
+        theme.apply(self.titleLabel, 'overlayTitle')
+        self.stepLabel = QLabel("")
+        theme.apply(self.stepLabel, 'overlayText')
+        self.progressBar = QProgressBar()
+        self.progressBar.setMinimumWidth(400)
+        self.cancelButton = QPushButton("Cancel")
+        self.cancelButton.setMinimumHeight(60)
+        for widget in (self.titleLabel, self.stepLabel, self.progressBar, self.cancelButton):
+            layout.addWidget(widget, 0, Qt.AlignCenter)
+
+        parent.installEventFilter(self)
+        self.setGeometry(parent.rect())
+
+    def attach(self, job):
+        """Follow a job's progress; the overlay closes itself when the job finishes."""
+        self.cancelButton.clicked.connect(job.cancel)
+        self.cancelButton.clicked.connect(lambda: self.cancelButton.setEnabled(False))
+        job.progress.connect(self._on_progress)
+        job.finished.connect(lambda _: self.close_overlay())
+        self.show()
+        self.raise_()
+
+    def close_overlay(self):
+        self.parent().removeEventFilter(self)
+        self.hide()
+        self.deleteLater()
+
+    def _on_progress(self, index, total, name):
+        self.progressBar.setMaximum(max(total, 1))
+        self.progressBar.setValue(index)
+        self.stepLabel.setText(name)
+
+    def eventFilter(self, obj, event):
+        # Keep covering the parent when it is resized
+        if obj is self.parent() and event.type() == QEvent.Resize:
+            self.setGeometry(obj.rect())
+        return False
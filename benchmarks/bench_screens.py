@@ -0,0 +1,349 @@
+"""
+Headless benchmarks for the settings and calibration screens.
+
+Runs offscreen against a generated settings plugin tree of N pages and a stub
+main window whose octoprint_client only records commands, so no printer,
+display or OctoPrint install is needed (the application's utils package must
+be importable, as for the screens themselves).
+
+    python benchmarks/bench_screens.py --pages 5 25 50 100 200 --output report.json
+    python benchmarks/bench_screens.py --compare previous.json
+
+The JSON report holds per-benchmark timing statistics keyed by plugin page
+count, so reports from different releases can be compared.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+WORK_DIR = tempfile.mkdtemp(prefix='controlcenter-bench-')
+os.environ['CONTROLCENTER_UI_CACHE'] = os.path.join(WORK_DIR, 'ui-cache')
+os.environ['CONTROLCENTER_JOURNAL'] = os.path.join(WORK_DIR, 'calibration.journal')
+
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+SETTINGS_SCREEN_UI = """<?xml version="1.0" encoding="UTF-8"?>
+<ui version="4.0">
+ <class>SettingsScreen</class>
+ <widget class="QWidget" name="SettingsScreen">
+  <property name="geometry"><rect><x>0</x><y>0</y><width>800</width><height>480</height></rect></property>
+  <layout class="QVBoxLayout" name="outerLayout">
+   <item>
+    <widget class="QStackedWidget" name="mainSettingsStackedWidget">
+     <widget class="QWidget" name="mainSettingsPage">
+      <layout class="QVBoxLayout" name="mainSettingsLayout">
+       <item>
+        <widget class="QScrollArea" name="scrollArea">
+         <property name="widgetResizable"><bool>true</bool></property>
+         <widget class="QWidget" name="scrollAreaWidgetContents">
+          <layout class="QVBoxLayout" name="verticalLayout">
+           <item><widget class="QPushButton" name="settingsBackButton"><property name="text"><string>Back</string></property></widget></item>
+           <item><widget class="QPushButton" name="restorePrintSettingsButton"><property name="text"><string>Restore Print Settings</string></property></widget></item>
+           <item><widget class="QPushButton" name="restoreFactoryDefaultsButton"><property name="text"><string>Restore Factory Defaults</string></property></widget></item>
+           <item><widget class="QPushButton" name="restartButton"><property name="text"><string>Restart</string></property></widget></item>
+          </layout>
+         </widget>
+        </widget>
+       </item>
+      </layout>
+     </widget>
+    </widget>
+   </item>
+  </layout>
+ </widget>
+</ui>
+"""
+
+PLUGIN_UI = """<?xml version="1.0" encoding="UTF-8"?>
+<ui version="4.0">
+ <class>{name}</class>
+ <widget class="QWidget" name="{name}">
+  <layout class="QVBoxLayout" name="{name}Layout">
+   <item><widget class="QLabel" name="{name}Title"><property name="text"><string>{name}</string></property></widget></item>
+   <item><widget class="QLineEdit" name="{name}Edit"/></item>
+   <item><widget class="QDoubleSpinBox" name="{name}SpinBox"/></item>
+   <item><widget class="QCheckBox" name="{name}CheckBox"/></item>
+   <item><widget class="QPushButton" name="{name}BackButton"><property name="text"><string>Back</string></property></widget></item>
+  </layout>
+ </widget>
+</ui>
+"""
+
+PLUGIN_PY = """from PyQt5.QtWidgets import QPushButton
+
+
+class {class_name}(object):
+    def __init__(self, widget, settings_screen):
+        self.widget = widget
+        back_button = widget.findChild(QPushButton, "{name}BackButton")
+        back_button.clicked.connect(settings_screen.go_back_page)
+"""
+
+TOOL_OFFSET_UI = """<?xml version="1.0" encoding="UTF-8"?>
+<ui version="4.0">
+ <class>toolOffset</class>
+ <widget class="QWidget" name="toolOffset">
+  <layout class="QVBoxLayout" name="toolOffsetLayout">
+   <item>
+    <widget class="QStackedWidget" name="stackedWidget">
+     <widget class="QWidget" name="toolOffsetXYPage">
+      <layout class="QVBoxLayout" name="xyLayout">
+       <item><widget class="QPushButton" name="toolOffsetXYBackButton"/></item>
+       <item><widget class="QDoubleSpinBox" name="toolOffsetXDoubleSpinBox"/></item>
+       <item><widget class="QPushButton" name="toolOffsetXSetButton"/></item>
+       <item><widget class="QLabel" name="currentToolOffsetXLabel"/></item>
+       <item><widget class="QDoubleSpinBox" name="toolOffsetYDoubleSpinBox"/></item>
+       <item><widget class="QPushButton" name="toolOffsetYSetButton"/></item>
+       <item><widget class="QLabel" name="currentToolOffsetYLabel"/></item>
+      </layout>
+     </widget>
+     <widget class="QWidget" name="toolOffsetZPage">
+      <layout class="QVBoxLayout" name="zLayout">
+       <item><widget class="QPushButton" name="toolOffsetZBackButton"/></item>
+       <item><widget class="QDoubleSpinBox" name="toolOffsetZDoubleSpinBox"/></item>
+       <item><widget class="QPushButton" name="toolOffsetZSetButton"/></item>
+       <item><widget class="QLabel" name="currentToolOffsetZLabel"/></item>
+      </layout>
+     </widget>
+    </widget>
+   </item>
+  </layout>
+ </widget>
+</ui>
+"""
+
+NOZZLE_OFFSET_UI = """<?xml version="1.0" encoding="UTF-8"?>
+<ui version="4.0">
+ <class>nozzleOffsetPage</class>
+ <widget class="QWidget" name="nozzleOffsetPage">
+  <layout class="QVBoxLayout" name="nozzleOffsetLayout">
+   <item><widget class="QPushButton" name="nozzleOffsetBackButton"/></item>
+   <item><widget class="QDoubleSpinBox" name="nozzleOffsetDoubleSpinBox"/></item>
+   <item><widget class="QPushButton" name="nozzleOffsetSetButton"/></item>
+   <item><widget class="QLabel" name="currentNozzleOffset_2"/></item>
+  </layout>
+ </widget>
+</ui>
+"""
+
+
+class StubOctoprintClient(object):
+    """Stands in for the OctoPrint client; records commands instead of sending them."""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.commands = []
+
+    def gcode(self, command):
+        if self.latency:
+            time.sleep(self.latency)
+        self.commands.append(command)
+
+
+class StubMainWindow(object):
+    """The parts of the main window the screens use."""
+    def __init__(self, latency=0.0):
+        self.octoprint_client = StubOctoprintClient(latency)
+
+    def switch_screen(self, screen):
+        pass
+
+
+def generate_plugin_tree(root, pages):
+    """
+    Write a settings folder with the main settings .ui and N plugin pages.
+
+    Returns:
+        list: The generated plugin names.
+    """
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, 'settings_screen.ui'), 'w') as f:
+        f.write(SETTINGS_SCREEN_UI)
+    names = []
+    for index in range(pages):
+        name = f'bench_page_{index:03d}'
+        folder = os.path.join(root, name)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f'{name}.ui'), 'w') as f:
+            f.write(PLUGIN_UI.format(name=name))
+        with open(os.path.join(folder, f'{name}.py'), 'w') as f:
+            f.write(PLUGIN_PY.format(name=name, class_name=name.title().replace('_', '')))
+        names.append(name)
+    return names
+
+
+def stats(samples):
+    """Summarise timing samples (seconds) in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'min_ms': ordered[0] * 1000,
+        'median_ms': ordered[len(ordered) // 2] * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+    }
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_settings_screen(app, folder, names, repeat):
+    """Construction (lazy, and eager up to the first frame and in total) and page-switch latency of SettingsScreen."""
+    import plugin_registry
+    from settings_screen import SettingsScreen
+
+    plugin_registry.MANIFEST_PATH = os.path.join(WORK_DIR, 'settings_plugins.json')
+
+    results = {}
+    built = []
+    for lazy in (True, False):
+        samples = []
+        for _ in range(repeat):
+            screen_holder = []
+            samples.append(timed(lambda: screen_holder.append(
+                SettingsScreen(StubMainWindow(), lazy=lazy, settings_folder=folder, max_pages=None))))
+            if not lazy:
+                # Pages left to the idle-time scheduler, built in one go
+                built.append(timed(screen_holder[0].page_scheduler.flush))
+            screen_holder[0].deleteLater()
+            app.processEvents()
+        results['construct_lazy' if lazy else 'construct_eager'] = stats(samples)
+    results['eager_build_remaining'] = stats(built)
+
+    screen = SettingsScreen(StubMainWindow(), lazy=True, settings_folder=folder, max_pages=None)
+    targets = names[::max(1, len(names) // 20)]
+    first_visit = [timed(lambda: screen.load_widget(name)) for name in targets]
+    revisit = []
+    for _ in range(repeat):
+        for name in targets:
+            revisit.append(timed(lambda: screen.load_widget(name)))
+            screen.go_back_page()
+    results['load_widget_first_visit'] = stats(first_visit)
+    results['load_widget_revisit'] = stats(revisit)
+    screen.deleteLater()
+    app.processEvents()
+    return results
+
+
+def bench_calibration(app, calibration_dir, repeat):
+    """Construction and Set-button handling of ToolOffset and NozzleOffsetPage."""
+    from toolOffset import ToolOffset
+    from nozzleOffsetPage import NozzleOffsetPage
+
+    ToolOffset.UI_FILE = os.path.join(calibration_dir, 'toolOffset.ui')
+    NozzleOffsetPage.UI_FILE = os.path.join(calibration_dir, 'nozzleOffsetPage.ui')
+
+    results = {}
+    main_window = StubMainWindow()
+    for cls, key, button_names in (
+            (ToolOffset, 'tool_offset', ('toolOffsetXSetButton', 'toolOffsetYSetButton', 'toolOffsetZSetButton')),
+            (NozzleOffsetPage, 'nozzle_offset', ('nozzleOffsetSetButton',))):
+        holder = []
+        results[f'{key}_construct'] = stats([timed(lambda: holder.append(cls(main_window))) for _ in range(repeat)])
+        page = holder[-1]
+        clicks = []
+        for _ in range(repeat * 10):
+            for button_name in button_names:
+                clicks.append(timed(getattr(page, button_name).click))
+        results[f'{key}_set_click'] = stats(clicks)
+        results[f'{key}_writes_saved'] = page.offset_coalescer.writes_saved
+        results[f'{key}_flush'] = stats([timed(page.offset_coalescer.flush)])
+        for widget in holder:
+            widget.deleteLater()
+        app.processEvents()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, previous):
+    """Print each benchmark's median next to a previous report's."""
+    def rows(current, before, pages):
+        for name, result in sorted(current.items()):
+            old = before.get(name)
+            if old is None:
+                continue
+            change = (result['median_ms'] / old['median_ms'] - 1) * 100 if old['median_ms'] else 0.0
+            print(f"{name:32} {pages:>6} {old['median_ms']:10.2f} {result['median_ms']:10.2f} {change:+7.1f}%")
+
+    print(f"{'benchmark':32} {'pages':>6} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    rows(report['calibration'], previous.get('calibration', {}), '-')
+    for pages, benchmarks in sorted(report['results'].items(), key=lambda item: int(item[0])):
+        rows(benchmarks, previous.get('results', {}).get(pages, {}), pages)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[5, 25, 50, 100, 200],
+                        help="plugin page counts to benchmark")
+    parser.add_argument('--repeat', type=int, default=5, help="repetitions per measurement")
+    parser.add_argument('--output', default='bench_report.json', help="where to write the JSON report")
+    parser.add_argument('--compare', help="previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'pyqt': PYQT_VERSION_STR,
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+    try:
+        calibration_dir = os.path.join(WORK_DIR, 'calibrate_screen')
+        os.makedirs(calibration_dir)
+        with open(os.path.join(calibration_dir, 'toolOffset.ui'), 'w') as f:
+            f.write(TOOL_OFFSET_UI)
+        with open(os.path.join(calibration_dir, 'nozzleOffsetPage.ui'), 'w') as f:
+            f.write(NOZZLE_OFFSET_UI)
+        report['calibration'] = bench_calibration(app, calibration_dir, args.repeat)
+
+        for pages in args.pages:
+            folder = os.path.join(WORK_DIR, f'settings_screen_{pages}')
+            names = generate_plugin_tree(folder, pages)
+            report['results'][str(pages)] = bench_settings_screen(app, folder, names, args.repeat)
+            construct = report['results'][str(pages)]
+            print(f"{pages:4} pages: construct lazy {construct['construct_lazy']['median_ms']:.1f} ms, "
+                  f"eager {construct['construct_eager']['median_ms']:.1f} ms, "
+                  f"switch {construct['load_widget_revisit']['median_ms']:.2f} ms")
+        for name, result in sorted(report['calibration'].items()):
+            print(f"{name:32} median {result['median_ms']:.3f} ms")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
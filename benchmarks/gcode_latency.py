@@ -0,0 +1,197 @@
+"""
+End-to-end latency from a Set button press to the printer's acknowledgement.
+
+Starts the mock OctoPrint server in-process, points a stub main window's
+octoprint_client at it and drives the real ToolOffset and NozzleOffsetPage
+screens offscreen. For every press it records how long click() blocked the
+GUI thread, when the mock printer acknowledged the offset batch (offset
+command + M500) and when the screen saw the confirmation. Optional load
+clients keep the printer busy with their own commands meanwhile.
+
+    python benchmarks/gcode_latency.py --presses 50 --latency 0.03 --jitter 0.02 --load-clients 4
+    python benchmarks/gcode_latency.py --settle-ms 1000 --error-rate 0.05 --output latency.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import threading
+
+# bench_screens puts the repository on sys.path and selects the offscreen platform
+from bench_screens import WORK_DIR, TOOL_OFFSET_UI, NOZZLE_OFFSET_UI, StubMainWindow, stats, git_revision
+from mock_octoprint import MockOctoprintServer, MockOctoprintClient
+from PyQt5.QtWidgets import QApplication
+
+# How the screens are driven: (class name, set button, spinbox, offset command)
+TARGETS = (
+    ('ToolOffset', 'toolOffsetXSetButton', 'toolOffsetXDoubleSpinBox', 'M218'),
+    ('ToolOffset', 'toolOffsetYSetButton', 'toolOffsetYDoubleSpinBox', 'M218'),
+    ('NozzleOffsetPage', 'nozzleOffsetSetButton', 'nozzleOffsetDoubleSpinBox', 'M851'),
+)
+
+
+class MockMainWindow(StubMainWindow):
+    """Stub main window whose octoprint_client talks to the mock server."""
+    def __init__(self, url):
+        super(MockMainWindow, self).__init__()
+        self.octoprint_client = MockOctoprintClient(url)
+
+
+class LoadClient(threading.Thread):
+    """Sends commands to the mock printer in a loop, as other OctoPrint clients would."""
+    def __init__(self, url, command='M105'):
+        super(LoadClient, self).__init__(daemon=True)
+        self.client = MockOctoprintClient(url)
+        self.command = command
+        self.sent = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.client.gcode(self.command)
+            except IOError:
+                pass
+            self.sent += 1
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def wait_for(app, condition, timeout):
+    """Process events until condition() is true; returns False on timeout."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.0005)
+    return True
+
+
+def measure_presses(app, server, screens, presses, settle_ms, timeout):
+    """
+    Press Set buttons and time each press until the printer acknowledges it.
+
+    Returns:
+        dict: Timing statistics and counts of failed and timed-out presses.
+    """
+    acks = []
+    server.listeners.append(lambda commands, acknowledged: acks.append((commands, acknowledged)))
+
+    click, ack, confirm = [], [], []
+    failed = timed_out = 0
+    for press in range(presses):
+        class_name, button_name, spinbox_name, command = TARGETS[press % len(TARGETS)]
+        screen = screens[class_name]
+        coalescer = screen.offset_coalescer
+        coalescer.settle_ms = settle_ms
+        getattr(screen, spinbox_name).setValue(0.05)
+
+        outcome = []
+        on_committed = lambda values: outcome.append(('committed', time.perf_counter()))  # noqa: E731
+        on_failed = lambda e: outcome.append(('failed', time.perf_counter()))  # noqa: E731
+        coalescer.committed.connect(on_committed)
+        coalescer.failed.connect(on_failed)
+        del acks[:]
+
+        pressed = time.perf_counter()
+        getattr(screen, button_name).click()
+        click.append(time.perf_counter() - pressed)
+
+        if not wait_for(app, lambda: outcome, timeout):
+            timed_out += 1
+        elif outcome[0][0] == 'failed':
+            failed += 1
+        else:
+            confirm.append(outcome[0][1] - pressed)
+            acknowledged = [at for commands, at in acks if commands[0].startswith(command) and 'M500' in commands]
+            if acknowledged:
+                ack.append(acknowledged[0] - pressed)
+        coalescer.committed.disconnect(on_committed)
+        coalescer.failed.disconnect(on_failed)
+
+    results = {'click': stats(click), 'failed': failed, 'timed_out': timed_out}
+    if ack:
+        results['press_to_ack'] = stats(ack)
+    if confirm:
+        results['press_to_confirm'] = stats(confirm)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--presses', type=int, default=30, help="number of Set button presses")
+    parser.add_argument('--settle-ms', type=int, default=0,
+                        help="coalescing window; the screens use 1000, 0 measures the bare round trip")
+    parser.add_argument('--latency', type=float, default=0.02, help="mock server delay per request (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="mock server random extra delay (s)")
+    parser.add_argument('--busy-every', type=float, default=0.0, help="start a busy period every N s")
+    parser.add_argument('--busy-duration', type=float, default=0.0, help="length of a busy period (s)")
+    parser.add_argument('--busy-latency', type=float, default=0.0, help="extra delay while busy (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests failing")
+    parser.add_argument('--command-time', type=float, default=0.002, help="time the printer spends per command (s)")
+    parser.add_argument('--load-clients', type=int, default=0, help="threads sending M105 concurrently")
+    parser.add_argument('--timeout', type=float, default=10.0, help="give up on a press after N s")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    server = MockOctoprintServer(latency=args.latency, jitter=args.jitter, busy_every=args.busy_every,
+                                 busy_duration=args.busy_duration, busy_latency=args.busy_latency,
+                                 error_rate=args.error_rate, command_time=args.command_time,
+                                 seed=args.seed).start()
+    load = [LoadClient(server.url) for _ in range(args.load_clients)]
+    try:
+        from toolOffset import ToolOffset
+        from nozzleOffsetPage import NozzleOffsetPage
+
+        for cls, template in ((ToolOffset, TOOL_OFFSET_UI), (NozzleOffsetPage, NOZZLE_OFFSET_UI)):
+            cls.UI_FILE = os.path.join(WORK_DIR, f'{cls.__name__}.ui')
+            with open(cls.UI_FILE, 'w') as f:
+                f.write(template)
+
+        main_window = MockMainWindow(server.url)
+        screens = {'ToolOffset': ToolOffset(main_window), 'NozzleOffsetPage': NozzleOffsetPage(main_window)}
+        for client in load:
+            client.start()
+
+        results = measure_presses(app, server, screens, args.presses, args.settle_ms, args.timeout)
+        results['server'] = main_window.octoprint_client.stats()
+        results['load_commands'] = sum(client.sent for client in load)
+        results['eeprom'] = server.printer.snapshot()['eeprom']
+    finally:
+        for client in load:
+            client.stop()
+        server.stop()
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    for name in ('click', 'press_to_ack', 'press_to_confirm'):
+        if name in results:
+            result = results[name]
+            print(f"{name:18} median {result['median_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  (n={result['n']})")
+    print(f"failed {results['failed']}, timed out {results['timed_out']}, "
+          f"EEPROM writes {results['server']['eeprom_writes']}, load commands {results['load_commands']}")
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'options': vars(args),
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+Local stand-in for OctoPrint and a Marlin-style printer, for offline testing.
+
+Serves the parts of the OctoPrint REST API the UI uses and simulates the
+printer behind it: M218/M851 change the working offsets, M500 saves them to a
+simulated EEPROM, M501 loads them back, M502 restores firmware defaults and
+M503 prints the settings report to the terminal log. Latency, jitter, busy
+periods and injected errors are configurable.
+
+    python benchmarks/mock_octoprint.py --port 5000 --latency 0.05 --jitter 0.02 --error-rate 0.01
+
+Endpoints:
+    GET  /api/version
+    GET  /api/printer                 current offsets and EEPROM contents
+    POST /api/printer/command         {"command": "..."} or {"commands": [...]}
+    GET  /api/mock/terminal?since=N   terminal lines (as OctoPrint's "current" push logs)
+    GET  /api/mock/stats              counters (requests, commands, EEPROM writes, errors)
+
+MockOctoprintClient offers the gcode() and gcode_batch() calls the dispatcher
+uses and the add_current_listener() push subscription the printer-state cache
+uses, so it can be set as a main window's octoprint_client (see gcode_latency.py).
+"""
+import sys
+import json
+import time
+import copy
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FACTORY_SETTINGS = {
+    'tool_offsets': {0: {'X': 0.0, 'Y': 0.0, 'Z': 0.0}, 1: {'X': 0.0, 'Y': 0.0, 'Z': 0.0}},
+    'probe_offset': {'X': 0.0, 'Y': 0.0, 'Z': 0.0},
+}
+
+
+class SimulatedPrinter(object):
+    """
+    Working settings plus EEPROM, driven by G-code.
+
+    Commands run one at a time, as over the printer's serial line; command_time
+    is how long each one occupies the printer.
+    """
+    def __init__(self, command_time=0.0):
+        self.command_time = command_time
+        self.lock = threading.Lock()
+        self.settings = copy.deepcopy(FACTORY_SETTINGS)
+        self.eeprom = copy.deepcopy(FACTORY_SETTINGS)
+        self.terminal = []
+        self.eeprom_writes = 0
+        self.commands = 0
+
+    def _log(self, line):
+        self.terminal.append(line)
+
+    def _axes(self, words):
+        axes = {}
+        for word in words:
+            if word[:1].upper() in 'XYZ' and len(word) > 1:
+                axes[word[0].upper()] = float(word[1:])
+        return axes
+
+    def execute(self, command):
+        """Run one command; raises ValueError for commands the firmware rejects."""
+        with self.lock:
+            self.commands += 1
+            if self.command_time:
+                time.sleep(self.command_time)
+            self._log(f"Send: {command}")
+            words = command.split(';')[0].split()
+            if not words:
+                return
+            code = words[0].upper()
+            if code == 'M218':
+                tool = 1
+                for word in words[1:]:
+                    if word[:1].upper() == 'T':
+                        tool = int(word[1:])
+                if tool not in self.settings['tool_offsets']:
+                    raise ValueError(f"Invalid extruder {tool}")
+                self.settings['tool_offsets'][tool].update(self._axes(words[1:]))
+            elif code == 'M851':
+                axes = self._axes(words[1:])
+                if not axes:
+                    probe = self.settings['probe_offset']
+                    self._log(f"Recv: Probe Offset X{probe['X']:.2f} Y{probe['Y']:.2f} Z{probe['Z']:.2f}")
+                self.settings['probe_offset'].update(axes)
+            elif code == 'M500':
+                self.eeprom = copy.deepcopy(self.settings)
+                self.eeprom_writes += 1
+                self._log("Recv: echo:Settings Stored")
+            elif code == 'M501':
+                self.settings = copy.deepcopy(self.eeprom)
+            elif code == 'M502':
+                self.settings = copy.deepcopy(FACTORY_SETTINGS)
+            elif code == 'M503':
+                for tool, offsets in sorted(self.settings['tool_offsets'].items()):
+                    if tool:
+                        self._log(f"Recv: echo:  M218 T{tool} X{offsets['X']:.2f} Y{offsets['Y']:.2f} Z{offsets['Z']:.3f}")
+                probe = self.settings['probe_offset']
+                self._log(f"Recv: echo:  M851 X{probe['X']:.2f} Y{probe['Y']:.2f} Z{probe['Z']:.2f}")
+            self._log("Recv: ok")
+
+    def snapshot(self):
+        with self.lock:
+            return {'settings': copy.deepcopy(self.settings), 'eeprom': copy.deepcopy(self.eeprom)}
+
+
+class MockOctoprintServer(ThreadingHTTPServer):
+    """
+    HTTP server simulating OctoPrint.
+
+    Args:
+        address (tuple): (host, port); port 0 picks a free port.
+        latency (float): Base delay per request, in seconds.
+        jitter (float): Random extra delay, uniform in [0, jitter].
+        busy_every (float): Start a busy period every N seconds (0 disables).
+        busy_duration (float): Length of each busy period.
+        busy_latency (float): Extra delay per request during a busy period.
+        error_rate (float): Fraction of command requests answered with HTTP 500.
+        command_time (float): Time the printer spends on each command.
+        seed (int, optional): Seed for jitter and error injection.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, jitter=0.0, busy_every=0.0,
+                 busy_duration=0.0, busy_latency=0.0, error_rate=0.0, command_time=0.0, seed=None):
+        super(MockOctoprintServer, self).__init__(address, MockOctoprintHandler)
+        self.printer = SimulatedPrinter(command_time)
+        self.latency = latency
+        self.jitter = jitter
+        self.busy_every = busy_every
+        self.busy_duration = busy_duration
+        self.busy_latency = busy_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.listeners = []
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def is_busy(self):
+        if not self.busy_every:
+            return False
+        return (time.monotonic() - self.started) % self.busy_every < self.busy_duration
+
+    def delay(self):
+        """Sleep for the configured latency, jitter and busy penalty."""
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if self.is_busy():
+            delay += self.busy_latency
+        if delay:
+            time.sleep(delay)
+
+    def inject_error(self):
+        return self.error_rate and self.random.random() < self.error_rate
+
+    def acknowledge(self, commands):
+        """Report processed commands to listeners (called from request threads)."""
+        acknowledged = time.perf_counter()
+        for listener in list(self.listeners):
+            listener(commands, acknowledged)
+
+    def start(self):
+        """Serve from a background thread; returns the server."""
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-octoprint', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class MockOctoprintHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=None):
+        data = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        url = urlparse(self.path)
+        if url.path == '/api/version':
+            self._reply(200, {'api': '0.1', 'server': '1.9.0', 'text': 'OctoPrint (mock)'})
+        elif url.path == '/api/printer':
+            server.delay()
+            self._reply(200, server.printer.snapshot())
+        elif url.path == '/api/mock/terminal':
+            since = int(parse_qs(url.query).get('since', ['0'])[0])
+            with server.printer.lock:
+                lines = server.printer.terminal[since:]
+                total = len(server.printer.terminal)
+            self._reply(200, {'logs': lines, 'next': total})
+        elif url.path == '/api/mock/stats':
+            self._reply(200, {
+                'requests': server.requests,
+                'errors': server.errors,
+                'commands': server.printer.commands,
+                'eeprom_writes': server.printer.eeprom_writes,
+            })
+        else:
+            self._reply(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        server = self.server
+        server.requests += 1
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._reply(400, {'error': 'Malformed JSON body'})
+            return
+        if urlparse(self.path).path != '/api/printer/command':
+            self._reply(404, {'error': 'Not found'})
+            return
+
+        commands = payload.get('commands') or ([payload['command']] if 'command' in payload else [])
+        if not commands or not all(isinstance(command, str) for command in commands):
+            self._reply(400, {'error': 'No command(s) given'})
+            return
+
+        server.delay()
+        if server.inject_error():
+            server.errors += 1
+            self._reply(500, {'error': 'Injected error'})
+            return
+        for command in commands:
+            try:
+                server.printer.execute(command)
+            except ValueError as e:
+                server.errors += 1
+                self._reply(409, {'error': str(e)})
+                return
+        server.acknowledge(commands)
+        self._reply(204)
+
+
+class MockOctoprintClient(object):
+    """
+    Minimal OctoPrint client for the mock server, with the gcode calls the UI uses.
+
+    Each thread keeps one persistent HTTP connection. Push payloads are
+    emulated by polling the terminal log.
+    """
+    POLL_INTERVAL = 0.02
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self._local = threading.local()
+        self._listeners = []
+        self._poller = None
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return connection
+
+    def _request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if data else {}
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=data, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if response.status >= 400:
+            raise IOError(f"OctoPrint returned {response.status}: {content.decode(errors='replace')}")
+        return json.loads(content) if content else None
+
+    def gcode(self, command):
+        """Send one command string."""
+        return self._request('POST', '/api/printer/command', {'command': command})
+
+    def gcode_batch(self, commands):
+        """Send a list of commands as one request."""
+        return self._request('POST', '/api/printer/command', {'commands': list(commands)})
+
+    def terminal(self, since=0):
+        return self._request('GET', f'/api/mock/terminal?since={since}')
+
+    def add_current_listener(self, callback):
+        """Call callback(payload) with a "current"-style payload ({"logs": [...]}) for new terminal lines."""
+        self._listeners.append(callback)
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll_terminal, name='mock-push', daemon=True)
+            self._poller.start()
+
+    def _poll_terminal(self):
+        since = 0
+        while True:
+            try:
+                reply = self.terminal(since)
+            except (IOError, http.client.HTTPException):
+                # Server stopped or busy; a real push connection would reconnect
+                time.sleep(self.POLL_INTERVAL * 10)
+                continue
+            since = reply['next']
+            if reply['logs']:
+                for callback in list(self._listeners):
+                    callback({'logs': reply['logs']})
+            time.sleep(self.POLL_INTERVAL)
+
+    def stats(self):
+        return self._request('GET', '/api/mock/stats')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock OctoPrint server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.0, help="base delay per request (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra delay (s)")
+    parser.add_argument('--busy-every', type=float, default=0.0, help="start a busy period every N s")
+    parser.add_argument('--busy-duration', type=float, default=0.0, help="length of a busy period (s)")
+    parser.add_argument('--busy-latency', type=float, default=0.0, help="extra delay while busy (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of commands failing")
+    parser.add_argument('--command-time', type=float, default=0.0, help="time the printer spends per command (s)")
+    args = parser.parse_args(argv)
+
+    server = MockOctoprintServer((args.host, args.port), args.latency, args.jitter, args.busy_every,
+                                 args.busy_duration, args.busy_latency, args.error_rate, args.command_time)
+    print(f"Mock OctoPrint listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+On-disk journal of applied calibration offsets (M218 tool offsets, M851 probe offset).
+
+The file is a small header, a table with the latest record of every
+(command, tool, axis) key, and an append-only log of fixed-size records:
+
+    header   magic "CCJ1", record size, slot count
+    slots    one record per key, rewritten in place on every append
+    log      every record ever appended, oldest first
+
+Reading the last known offsets at startup only touches the slot table, so it
+costs the same however long the log is. The log is memory-mapped for history
+queries (e.g. drift analysis) and compacted when it grows past a threshold.
+
+    journal = get_calibration_journal(main_window)
+    journal.record_offsets('M218', 1, {'X': 0.1, 'Y': -0.2})
+    journal.last_known('M218', 1)            # {'X': 0.1, 'Y': -0.2}
+    journal.history('M851', axis='Z')        # [JournalEntry(timestamp, 'M851', 0, 'Z', -1.5), ...]
+"""
+import os
+import mmap
+import time
+import struct
+from collections import namedtuple
+from async_logging import setup_logger
+
+ENV_VAR = 'CONTROLCENTER_JOURNAL'
+JOURNAL_PATH = os.environ.get(ENV_VAR) or os.path.join(
+    os.path.expanduser('~'), '.local', 'share', 'octoprint_ControlCenter', 'calibration.journal')
+
+MAGIC = b'CCJ1'
+HEADER = struct.Struct('<4sHH')
+# timestamp, command, tool, axis, value
+RECORD = struct.Struct('<d4sBc2xd')
+
+AXES = 'XYZ'
+MAX_TOOLS = 8
+# Slots: M218 for tools 0..MAX_TOOLS-1, then M851 (tool 0)
+SLOT_COUNT = (MAX_TOOLS + 1) * len(AXES)
+LOG_START = HEADER.size + SLOT_COUNT * RECORD.size
+
+# Compact when the log holds more records than this
+COMPACT_THRESHOLD = 10000
+
+JournalEntry = namedtuple('JournalEntry', 'timestamp code tool axis value')
+
+logger = setup_logger('calibration_journal')
+
+
+def slot_index(code, tool, axis):
+    """Return the slot table index of a key, or None if it has no slot."""
+    if axis not in AXES:
+        return None
+    if code == 'M218' and 0 <= tool < MAX_TOOLS:
+        return tool * len(AXES) + AXES.index(axis)
+    if code == 'M851':
+        return MAX_TOOLS * len(AXES) + AXES.index(axis)
+    return None
+
+
+def _pack(entry):
+    return RECORD.pack(entry.timestamp, entry.code.encode(), entry.tool, entry.axis.encode(), entry.value)
+
+
+def _unpack(data):
+    timestamp, code, tool, axis, value = data
+    return JournalEntry(timestamp, code.decode('ascii', 'replace'), tool, axis.decode('ascii', 'replace'), value)
+
+
+class CalibrationJournal(object):
+    """
+    Append-only journal of offsets accepted by the printer.
+
+    If the file cannot be opened the journal logs the error and records
+    nothing, so calibration pages keep working without it.
+    """
+    def __init__(self, path=None, compact_threshold=COMPACT_THRESHOLD):
+        """
+        Args:
+            path (str, optional): The journal file; defaults to JOURNAL_PATH.
+            compact_threshold (int): Log length that triggers compaction on open.
+        """
+        self.path = path or JOURNAL_PATH
+        self.compact_threshold = compact_threshold
+        self._fd = None
+        try:
+            self._open()
+            if compact_threshold and len(self) > compact_threshold:
+                self.compact()
+        except (OSError, ValueError) as e:
+            logger.error(f"Calibration journal {self.path} unavailable: {e}")
+            self.close()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.pwrite(self._fd, HEADER.pack(MAGIC, RECORD.size, SLOT_COUNT) + bytes(SLOT_COUNT * RECORD.size), 0)
+            return
+        magic, record_size, slot_count = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+        if (magic, record_size, slot_count) != (MAGIC, RECORD.size, SLOT_COUNT) or size < LOG_START:
+            raise ValueError("not a calibration journal, or written by an incompatible version")
+        torn = (size - LOG_START) % RECORD.size
+        if torn:
+            # A record cut short by a crash or power loss
+            os.ftruncate(self._fd, size - torn)
+            logger.warning(f"Dropped {torn} bytes of a partial record from {self.path}")
+
+    @property
+    def available(self):
+        return self._fd is not None
+
+    def __len__(self):
+        """Return the number of records in the log."""
+        if self._fd is None:
+            return 0
+        return (os.fstat(self._fd).st_size - LOG_START) // RECORD.size
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def record(self, code, tool, axis, value, timestamp=None):
+        """
+        Append one applied offset and make it the last known value of its key.
+
+        Args:
+            code (str): "M218" or "M851".
+            tool (int): The tool (0 for M851).
+            axis (str): "X", "Y" or "Z".
+            value (float): The offset the printer accepted.
+            timestamp (float, optional): Seconds since the epoch; defaults to now.
+        """
+        slot = slot_index(code, tool, axis)
+        if self._fd is None or slot is None:
+            return
+        data = _pack(JournalEntry(time.time() if timestamp is None else timestamp, code, tool, axis, float(value)))
+        try:
+            # Append at the end of the last whole record, then update the key's slot
+            os.pwrite(self._fd, data, LOG_START + len(self) * RECORD.size)
+            os.pwrite(self._fd, data, HEADER.size + slot * RECORD.size)
+        except OSError as e:
+            logger.error(f"Could not write calibration journal: {e}")
+
+    def record_offsets(self, code, tool, values):
+        """Append several axes of one command, e.g. the values of a committed "M218 T1 X.. Y..", with one timestamp."""
+        timestamp = time.time()
+        for axis, value in values.items():
+            self.record(code, tool, axis, value, timestamp)
+
+    def last_known(self, code, tool=0):
+        """
+        Return the last recorded offsets of a command and tool, read from the slot table.
+
+        Returns:
+            dict: {axis: value} for the axes ever recorded.
+        """
+        values = {}
+        if self._fd is None:
+            return values
+        first = slot_index(code, tool, AXES[0])
+        if first is None:
+            return values
+        data = os.pread(self._fd, len(AXES) * RECORD.size, HEADER.size + first * RECORD.size)
+        for fields in RECORD.iter_unpack(data):
+            entry = _unpack(fields)
+            if entry.timestamp:
+                values[entry.axis] = entry.value
+        return values
+
+    def history(self, code=None, tool=None, axis=None, since=None):
+        """
+        Return logged records, oldest first, optionally filtered.
+
+        Args:
+            code (str, optional): Only this command.
+            tool (int, optional): Only this tool.
+            axis (str, optional): Only this axis.
+            since (float, optional): Only records at or after this time (seconds since the epoch).
+
+        Returns:
+            list: JournalEntry tuples.
+        """
+        entries = []
+        for entry in self._entries():
+            if ((code is None or entry.code == code) and (tool is None or entry.tool == tool)
+                    and (axis is None or entry.axis == axis) and (since is None or entry.timestamp >= since)):
+                entries.append(entry)
+        return entries
+
+    def drift(self, code, tool, axis, since=None):
+        """Return (first value, last value, change) of a key over the logged history, or None."""
+        entries = self.history(code, tool, axis, since)
+        if not entries:
+            return None
+        return entries[0].value, entries[-1].value, entries[-1].value - entries[0].value
+
+    def _entries(self):
+        count = len(self)
+        if not count:
+            return []
+        with mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return [_unpack(fields) for fields in
+                        RECORD.iter_unpack(view[LOG_START:LOG_START + count * RECORD.size])]
+            finally:
+                view.release()
+
+    def compact(self, max_age=None, max_records=None):
+        """
+        Rewrite the journal without redundant records.
+
+        Records repeating the previous value of their key are dropped, then
+        records older than max_age seconds, then all but the newest
+        max_records. The slot table (last known values) is kept as it is.
+
+        Returns:
+            int: The number of records removed.
+        """
+        if self._fd is None:
+            return 0
+        entries = self._entries()
+        previous = {}
+        kept = []
+        for entry in entries:
+            key = (entry.code, entry.tool, entry.axis)
+            if previous.get(key) != entry.value:
+                kept.append(entry)
+            previous[key] = entry.value
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            kept = [entry for entry in kept if entry.timestamp >= cutoff]
+        if max_records is not None:
+            kept = kept[-max_records:] if max_records else []
+
+        head = os.pread(self._fd, LOG_START, 0)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(head)
+            f.write(b''.join(_pack(entry) for entry in kept))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        self.close()
+        self._open()
+        removed = len(entries) - len(kept)
+        logger.info(f"Compacted calibration journal: {removed} records removed, {len(kept)} kept")
+        return removed
+
+
+def get_calibration_journal(main_window):
+    """
+    Return the calibration journal of a main window, opening it on first use.
+
+    Args:
+        main_window: The application's main window.
+
+    Returns:
+        CalibrationJournal: The shared journal.
+    """
+    journal = getattr(main_window, 'calibration_journal', None)
+    if journal is None:
+        journal = CalibrationJournal()
+        main_window.calibration_journal = journal
+    return journal
@@ -0,0 +1,234 @@
+"""
+Restores the printer's firmware configuration files from the factory copies.
+
+Files are compared with their factory copy section by section and key by key
+(see klipper_config). Files that differ only in comments or formatting are
+left alone. Changes confined to [Variables] entries are applied with
+SAVE_VARIABLE commands instead of a file copy. Every other changed file is
+written atomically (temporary file in the target directory, then rename), and
+the restore reports the cheapest restart that activates the copies: RESTART
+for host-side settings, FIRMWARE_RESTART only for micro-controller settings.
+
+When the targets are not writable by the current user, every copy runs in a
+single privileged helper process instead of one "sudo cp" per file:
+
+    sudo python3 config_restore.py --apply < pairs.json
+"""
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import subprocess
+from collections import OrderedDict, namedtuple
+from klipper_config import parse_config, diff_configs, strongest_activation, save_variable_command
+
+FIRMWARE_SOURCE_DIR = 'firmware'
+FIRMWARE_TARGET_DIR = '/home/pi'
+FIRMWARE_FILES = [
+    'COMMON_FILAMENT_SENSOR.cfg',
+    'COMMON_GCODE_MACROS.cfg',
+    'COMMON_IDEX.cfg',
+    'COMMON_MOTHERBOARD.cfg',
+    'PRINTERS_TWINDRAGON_600x300.cfg',
+    'PRINTERS_TWINDRAGON_600x600.cfg',
+    'TOOLHEADS_TD-01_TOOLHEAD0.cfg',
+    'TOOLHEADS_TD-01_TOOLHEAD1.cfg',
+    'variables.cfg',
+]
+
+# Result of restoring one file. status is "unchanged", "equivalent" (differs only
+# in comments/formatting), "variables" (applied with SAVE_VARIABLE), "copied" or "failed".
+FileResult = namedtuple('FileResult', ['source', 'target', 'status', 'error'])
+
+# What a restore did: a FileResult per file, and the G-code commands that activate
+# the changes (SAVE_VARIABLE commands, then at most one RESTART or FIRMWARE_RESTART)
+RestoreReport = namedtuple('RestoreReport', ['results', 'commands'])
+
+
+
+def file_digest(path):
+    """
+    Return the SHA-256 of a file's contents, or None if it cannot be read.
+
+    Args:
+        path (str): The file to hash.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def read_text(path):
+    """Return a file's text, or None if it does not exist."""
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def atomic_copy(source, target):
+    """
+    Replace target with the contents of source via a temporary file and rename.
+
+    The target keeps its previous permissions and, when run as root, its owner.
+    """
+    target_dir = os.path.dirname(target) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.restore-', dir=target_dir)
+    try:
+        with os.fdopen(fd, 'wb') as tmp, open(source, 'rb') as src:
+            for chunk in iter(lambda: src.read(65536), b''):
+                tmp.write(chunk)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        try:
+            st = os.stat(target)
+            os.chmod(tmp_path, st.st_mode & 0o7777)
+            if os.geteuid() == 0:
+                os.chown(tmp_path, st.st_uid, st.st_gid)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def apply_copies(pairs):
+    """
+    Copy each (source, target) pair atomically.
+
+    Returns:
+        list: A FileResult per pair.
+    """
+    results = []
+    for source, target in pairs:
+        try:
+            atomic_copy(source, target)
+            results.append(FileResult(source, target, 'copied', None))
+        except OSError as e:
+            results.append(FileResult(source, target, 'failed', str(e)))
+    return results
+
+
+class ConfigRestoreEngine(object):
+    """
+    Copies factory configuration files over the live ones, skipping files that already match.
+    """
+    def __init__(self, files=FIRMWARE_FILES, source_dir=FIRMWARE_SOURCE_DIR,
+                 target_dir=FIRMWARE_TARGET_DIR, use_sudo=True):
+        """
+        Args:
+            files (list): File names to restore.
+            source_dir (str): Directory holding the factory copies.
+            target_dir (str): Directory holding the live files.
+            use_sudo (bool): Use one sudo helper process when targets are not writable.
+        """
+        self.files = list(files)
+        self.source_dir = os.path.abspath(source_dir)
+        self.target_dir = target_dir
+        self.use_sudo = use_sudo
+
+    def pairs(self):
+        """Return the (source, target) path of every file to restore."""
+        return [(os.path.join(self.source_dir, name), os.path.join(self.target_dir, name))
+                for name in self.files]
+
+    def plan(self):
+        """
+        Compare factory and live copies, by content hash and then semantically.
+
+        Returns:
+            tuple: (pairs to copy with their activation level as {pair: level},
+                    SAVE_VARIABLE commands, FileResult list for files that need no copy)
+        """
+        to_copy = OrderedDict()
+        commands = []
+        results = []
+        for source, target in self.pairs():
+            source_digest = file_digest(source)
+            if source_digest is None:
+                results.append(FileResult(source, target, 'failed', "factory copy missing or unreadable"))
+                continue
+            if source_digest == file_digest(target):
+                results.append(FileResult(source, target, 'unchanged', None))
+                continue
+            try:
+                live = read_text(target)
+                changes = diff_configs(parse_config(live or ''), parse_config(read_text(source) or ''))
+            except OSError as e:
+                results.append(FileResult(source, target, 'failed', str(e)))
+                continue
+            if live is not None and not changes:
+                results.append(FileResult(source, target, 'equivalent', None))
+            elif live is not None and all(change.activation == 'variable' and change.new is not None
+                                          for change in changes):
+                # Klipper writes variables.cfg itself; no copy or restart needed
+                commands.extend(save_variable_command(change.key, change.new) for change in changes)
+                results.append(FileResult(source, target, 'variables', None))
+            else:
+                to_copy[(source, target)] = strongest_activation(changes) or 'host'
+        return to_copy, commands, results
+
+    def restore(self):
+        """
+        Restore every file that differs from its factory copy.
+
+        Returns:
+            RestoreReport: A FileResult per file, in the configured order, and the
+            commands that activate the restored settings.
+        """
+        to_copy, commands, results = self.plan()
+        if to_copy:
+            pairs = list(to_copy)
+            if self.use_sudo and not self._can_write(pairs):
+                results.extend(self._apply_privileged(pairs))
+            else:
+                results.extend(apply_copies(pairs))
+
+        levels = [to_copy[(result.source, result.target)] for result in results if result.status == 'copied']
+        if levels:
+            # FIRMWARE_RESTART restarts the host software as well
+            commands.append('FIRMWARE_RESTART' if 'mcu' in levels else 'RESTART')
+
+        order = {target: index for index, (_, target) in enumerate(self.pairs())}
+        return RestoreReport(sorted(results, key=lambda result: order[result.target]), commands)
+
+    @staticmethod
+    def _can_write(pairs):
+        """Return True if every target (or its directory, for new files) is writable."""
+        for _, target in pairs:
+            if not os.access(os.path.dirname(target) or '.', os.W_OK):
+                return False
+            if os.path.exists(target) and not os.access(target, os.W_OK):
+                return False
+        return True
+
+    @staticmethod
+    def _apply_privileged(pairs):
+        """Run all copies in one sudo helper process."""
+        try:
+            completed = subprocess.run(
+                ['sudo', sys.executable, os.path.abspath(__file__), '--apply'],
+                input=json.dumps(pairs), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True, timeout=60)
+            if completed.returncode != 0:
+                raise OSError(completed.stderr.strip() or f"exit status {completed.returncode}")
+            return [FileResult(*result) for result in json.loads(completed.stdout)]
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            return [FileResult(source, target, 'failed', f"privileged copy failed: {e}")
+                    for source, target in pairs]
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['--apply']:
+        print("usage: config_restore.py --apply < pairs.json", file=sys.stderr)
+        sys.exit(2)
+    print(json.dumps([list(result) for result in apply_copies(json.load(sys.stdin))]))
@@ -0,0 +1,271 @@
+import queue
+import threading
+from concurrent.futures import Future
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from async_logging import setup_logger
+from startup_profiler import get_profiler
+
+
+class GcodeBatchError(Exception):
+    """
+    Raised when a G-code batch fails.
+
+    Attributes:
+        commands (list): The commands of the batch.
+        index (int): Index of the command that failed, or None when the
+            request for the whole batch was rejected.
+        error (Exception): The underlying error.
+
+    When the batch was sent one command at a time (index is set), the
+    commands before the failing one were already applied; see applied.
+    """
+    def __init__(self, commands, index, error):
+        self.commands = commands
+        self.index = index
+        self.error = error
+        if index is None:
+            message = f"G-code batch {commands} failed: {error}"
+        else:
+            message = f"G-code {commands[index]!r} (command {index + 1} of {len(commands)}) failed: {error}"
+        super(GcodeBatchError, self).__init__(message)
+
+    @property
+    def command(self):
+        """The command that failed, or None when the whole request was rejected."""
+        return None if self.index is None else self.commands[self.index]
+
+    @property
+    def applied(self):
+        """The commands the printer already received before the failure."""
+        return [] if self.index is None else self.commands[:self.index]
+
+
+class GcodeBatch(object):
+    """
+    An ordered list of G-code commands sent to OctoPrint together (in a single
+    request when the client supports it, see GcodeDispatcher.send_batch).
+
+    Example:
+        batch = GcodeBatch().add('M218 T1 X0.5').add('M500')
+        dispatcher.send_batch(batch, on_failure=handle_error)
+    """
+    def __init__(self, commands=None):
+        self.commands = []
+        for command in commands or []:
+            self.add(command)
+
+    def add(self, command):
+        """Append a command; returns the batch so calls can be chained."""
+        self.commands.append(command)
+        return self
+
+    def validate(self):
+        """Raise GcodeBatchError for the first command that cannot be sent."""
+        for index, command in enumerate(self.commands):
+            if not isinstance(command, str) or not command.strip() or '\n' in command:
+                raise GcodeBatchError(self.commands, index, ValueError("invalid G-code command"))
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __iter__(self):
+        return iter(self.commands)
+
+    def __repr__(self):
+        return f"GcodeBatch({self.commands!r})"
+
+
+class GcodeDispatcher(QObject):
+    """
+    Sends G-code to OctoPrint from a worker thread so button slots never block.
+
+    Commands are queued and sent one at a time by a single worker, which keeps
+    them in submission order for the printer and reuses the client's HTTP
+    connection between requests. Every send returns a Future; completion is
+    also reported through Qt signals, and optional callbacks are invoked on
+    the GUI thread.
+    """
+    # command, result
+    commandSucceeded = pyqtSignal(str, object)
+    # command, error message
+    commandFailed = pyqtSignal(str, str)
+
+    # Internal: hands a callback and its argument to the GUI thread
+    _callbackReady = pyqtSignal(object, object)
+
+    def __init__(self, get_client, name='printer'):
+        """
+        Args:
+            get_client (callable): Returns the OctoPrint client to send with.
+                Looked up per command, so a reconnected client is picked up.
+            name (str): Name of the printer, used for the worker thread.
+        """
+        super(GcodeDispatcher, self).__init__()
+        self.get_client = get_client
+        self.logger = setup_logger('gcode_dispatcher')
+        self._queue = queue.Queue()
+        self._callbackReady.connect(self._invoke_callback)
+        self._warned_no_batch = False
+        try:
+            self._check_batch_support(get_client())
+        except Exception:
+            # No client yet; checked again on the first batch
+            pass
+        self._thread = threading.Thread(target=self._run, name=f'gcode-{name}', daemon=True)
+        self._thread.start()
+
+    def send(self, command, on_success=None, on_failure=None):
+        """
+        Queue a G-code command.
+
+        Args:
+            command (str): The G-code command to send.
+            on_success (callable, optional): Called on the GUI thread with the result.
+            on_failure (callable, optional): Called on the GUI thread with the exception.
+
+        Returns:
+            Future: Resolves with the client's result, or the exception raised.
+        """
+        future = Future()
+        self._queue.put((command, future, on_success, on_failure))
+        self.logger.debug("Queued G-code: %s", command)
+        return future
+
+    def send_batch(self, batch, on_success=None, on_failure=None):
+        """
+        Queue several commands to be sent as one request.
+
+        The batch is checked before it is queued. Clients with a
+        gcode_batch(commands) method, which posts {"commands": [...]} to
+        OctoPrint's command endpoint, send it in a single request that succeeds
+        or fails as a whole. Other clients get one gcode() call per command,
+        stopping at the first failure: the batch is then NOT all-or-nothing,
+        and the GcodeBatchError's applied lists the commands that went through.
+        Failures raise GcodeBatchError, which names the failing command when it
+        can be told apart.
+
+        Args:
+            batch (GcodeBatch or list): The commands, in order.
+            on_success (callable, optional): Called on the GUI thread with the result.
+            on_failure (callable, optional): Called on the GUI thread with the GcodeBatchError.
+
+        Returns:
+            Future: Resolves with the client's result, or the GcodeBatchError raised.
+        """
+        if not isinstance(batch, GcodeBatch):
+            batch = GcodeBatch(batch)
+        try:
+            batch.validate()
+        except GcodeBatchError as e:
+            future = Future()
+            future.set_exception(e)
+            if on_failure:
+                self._callbackReady.emit(on_failure, e)
+            return future
+        return self.send(batch, on_success, on_failure)
+
+    def supports_batches(self, client=None):
+        """Return True if the client (default: the current one) sends a batch as one request."""
+        client = self.get_client() if client is None else client
+        return callable(getattr(client, 'gcode_batch', None))
+
+    def _check_batch_support(self, client):
+        """Log once that batches are sent command by command with this client."""
+        if client is None or self._warned_no_batch or self.supports_batches(client):
+            return
+        self._warned_no_batch = True
+        self.logger.warning(f"{type(client).__name__} has no gcode_batch(); G-code batches are sent one "
+                            "command at a time and are not all-or-nothing")
+
+    def pending(self):
+        """Return the number of commands waiting to be sent."""
+        return self._queue.qsize()
+
+    def shutdown(self, wait=True):
+        """Stop the worker once the queued commands have been sent."""
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            command, future, on_success, on_failure = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            name = ' | '.join(command) if isinstance(command, GcodeBatch) else command
+            try:
+                if isinstance(command, GcodeBatch):
+                    result = self._execute_batch(command.commands)
+                else:
+                    result = self._execute(command)
+            except Exception as e:
+                self.logger.error(f"G-code {name} failed: {e}")
+                future.set_exception(e)
+                self.commandFailed.emit(name, str(e))
+                if on_failure:
+                    self._callbackReady.emit(on_failure, e)
+            else:
+                future.set_result(result)
+                self.commandSucceeded.emit(name, result)
+                if on_success:
+                    self._callbackReady.emit(on_success, result)
+
+    def _execute(self, command):
+        """Send one command with the current client (runs on the worker thread)."""
+        with get_profiler().stage('gcode', page=command, category='gcode'):
+            return self.get_client().gcode(command=command)
+
+    def _execute_batch(self, commands):
+        """
+        Send a list of commands in one request (runs on the worker thread).
+
+        Support for batches is decided by the client's interface, never by an
+        exception, so a batch is not re-sent after part of it went through.
+        Clients without gcode_batch() are driven one command at a time,
+        stopping at the first failure; the commands before it stay applied.
+        """
+        client = self.get_client()
+        profiler = get_profiler()
+        if self.supports_batches(client):
+            try:
+                with profiler.stage('gcode batch', page=' | '.join(commands), category='gcode'):
+                    return client.gcode_batch(list(commands))
+            except Exception as e:
+                raise GcodeBatchError(commands, None, e)
+        self._check_batch_support(client)
+
+        results = []
+        for index, command in enumerate(commands):
+            try:
+                with profiler.stage('gcode', page=command, category='gcode'):
+                    results.append(client.gcode(command=command))
+            except Exception as e:
+                raise GcodeBatchError(commands, index, e)
+        return results
+
+    @pyqtSlot(object, object)
+    def _invoke_callback(self, callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            self.logger.error(f"Error in G-code completion callback: {e}")
+
+
+def get_dispatcher(main_window):
+    """
+    Return the G-code dispatcher of a main window's printer, creating it on first use.
+
+    Args:
+        main_window: The application's main window, with an octoprint_client.
+
+    Returns:
+        GcodeDispatcher: The shared dispatcher.
+    """
+    dispatcher = getattr(main_window, 'gcode_dispatcher', None)
+    if dispatcher is None:
+        dispatcher = GcodeDispatcher(lambda: main_window.octoprint_client)
+        main_window.gcode_dispatcher = dispatcher
+    return dispatcher
@@ -0,0 +1,155 @@
+"""
+Parsing and semantic comparison of Klipper configuration files.
+
+A file is read into sections of keys, the way Klipper reads it: comments and
+blank lines are ignored, indented lines continue the previous value, option
+names are case-insensitive and the "#*#" SAVE_CONFIG block at the end of a
+file overrides the sections above it. Two files are compared by section, key
+and value (numbers by value, so "0.50" equals "0.5"), and each change is
+classified by what Klipper needs to pick it up:
+
+    variable           a [Variables] entry of variables.cfg: SAVE_VARIABLE, no restart
+    host               host-side settings (macros, kinematics, ...): RESTART
+    mcu                micro-controller settings (pins, [mcu], drivers): FIRMWARE_RESTART
+"""
+import re
+import ast
+from collections import OrderedDict, namedtuple
+
+VARIABLES_SECTION = 'Variables'
+AUTOSAVE_PREFIX = '#*#'
+
+# Sections whose settings are sent to a micro-controller when it is configured
+MCU_SECTION_PREFIXES = ('mcu', 'tmc', 'board_pins', 'duplicate_pin_override', 'adxl345', 'static_digital_output')
+# Keys that configure micro-controller pins in any section
+MCU_KEY_PATTERN = re.compile(r'(^|_)pins?$')
+
+# How a change is activated, cheapest first
+ACTIVATIONS = ('variable', 'host', 'mcu')
+
+# One changed key; old is None for an added key, new is None for a removed one
+ConfigChange = namedtuple('ConfigChange', ['section', 'key', 'old', 'new', 'activation'])
+
+_SECTION = re.compile(r'^\[([^\]]+)\]')
+_OPTION = re.compile(r'^([^:=\s][^:=]*?)\s*[:=]\s*(.*)$')
+_COMMENT = re.compile(r'(^|\s)[#;].*$')
+
+
+def _strip_comment(line):
+    # As Klipper's configparser: "#" and ";" start a comment at the start of a line or after whitespace
+    return _COMMENT.sub('', line).rstrip()
+
+
+def parse_config(text):
+    """
+    Parse Klipper configuration text.
+
+    Args:
+        text (str): The file contents.
+
+    Returns:
+        OrderedDict: section name -> OrderedDict of lower-cased key -> value string.
+    """
+    body, autosave = [], []
+    for line in text.splitlines():
+        if line.startswith(AUTOSAVE_PREFIX):
+            # "#*# [probe]", "#*# z_offset = 1.2", "#*# \t  0.1, 0.2" (continuation)
+            line = line[len(AUTOSAVE_PREFIX):]
+            autosave.append(line[1:] if line.startswith(' ') else line)
+        else:
+            body.append(line)
+
+    sections = OrderedDict()
+    for lines in (body, autosave):
+        section = key = None
+        for raw in lines:
+            line = _strip_comment(raw)
+            if not line.strip():
+                continue
+            if raw[:1].isspace() and section is not None and key is not None:
+                # Continuation of a multi-line value (e.g. gcode:)
+                value = sections[section][key]
+                sections[section][key] = f"{value}\n{line.strip()}" if value else line.strip()
+                continue
+            match = _SECTION.match(line)
+            if match:
+                section = match.group(1).strip()
+                sections.setdefault(section, OrderedDict())
+                key = None
+                continue
+            match = _OPTION.match(line)
+            if match and section is not None:
+                key = match.group(1).strip().lower()
+                sections[section][key] = match.group(2).strip()
+    return sections
+
+
+def read_config(path):
+    """Parse a configuration file (see parse_config)."""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return parse_config(f.read())
+
+
+def _normalise(section, value):
+    """Return a comparable form of a value: a Python literal for variables, numbers as floats."""
+    if value is None:
+        return None
+    if section == VARIABLES_SECTION:
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+    try:
+        return float(value)
+    except ValueError:
+        return ' '.join(value.split())
+
+
+def activation_for(section, key):
+    """Return how a change to a key is activated: "variable", "host" or "mcu"."""
+    if section == VARIABLES_SECTION:
+        return 'variable'
+    name = section.split()[0].lower()
+    if name.startswith(MCU_SECTION_PREFIXES) or MCU_KEY_PATTERN.search(key):
+        return 'mcu'
+    return 'host'
+
+
+def diff_configs(live, factory):
+    """
+    Compare two parsed configurations.
+
+    Args:
+        live (dict): The configuration in use, from parse_config.
+        factory (dict): The configuration to restore, from parse_config.
+
+    Returns:
+        list: ConfigChange for every key that differs, in factory order, then removed keys.
+    """
+    changes = []
+    for section, options in factory.items():
+        live_options = live.get(section, {})
+        for key, value in options.items():
+            old = live_options.get(key)
+            if _normalise(section, old) != _normalise(section, value):
+                changes.append(ConfigChange(section, key, old, value, activation_for(section, key)))
+    for section, options in live.items():
+        factory_options = factory.get(section, {})
+        for key, value in options.items():
+            if key not in factory_options:
+                changes.append(ConfigChange(section, key, value, None, activation_for(section, key)))
+    return changes
+
+
+def strongest_activation(changes):
+    """Return the most expensive activation any of the changes needs, or None if there are none."""
+    levels = [ACTIVATIONS.index(change.activation) for change in changes]
+    return ACTIVATIONS[max(levels)] if levels else None
+
+
+def save_variable_command(key, value):
+    """Return the SAVE_VARIABLE command setting a variable to a value (a Python literal string)."""
+    value = value.strip()
+    if any(character.isspace() for character in value):
+        value = '"{}"'.format(value.replace('"', '\\"'))
+    return f"SAVE_VARIABLE VARIABLE={key} VALUE={value}"
@@ -0,0 +1,168 @@
+from async_logging import setup_logger
+
+# Router name of the calibration screen's landing page
+MAIN_CALIBRATE_PAGE = 'calibrate/main_calibrate_page'
+
+
+class NavigationRouter(object):
+    """
+    Central registry of named pages across the application's stacked widgets.
+
+    Pages are registered once under a unique name, so switching to a page is a
+    dictionary lookup instead of a findChild scan over every page. Each stacked
+    widget keeps its own back-stack so a back press on one screen never jumps
+    into another.
+    """
+    # Back-stack entries kept per stacked widget; screens that never go back
+    # through the router would otherwise grow their history for every visit
+    MAX_HISTORY = 32
+
+    def __init__(self):
+        self.logger = setup_logger('navigation_router')
+        self._pages = {}
+        self._history = {}
+
+    def register(self, name, stacked_widget, page):
+        """
+        Register a page under a name.
+
+        Args:
+            name (str): The unique name of the page, e.g. "settings/wifi".
+            stacked_widget (QStackedWidget): The stacked widget holding the page.
+            page (QWidget): The page widget.
+        """
+        self._pages[name] = (stacked_widget, page)
+        self.logger.debug("Registered page: %s", name)
+
+    def unregister(self, name):
+        """Remove a page from the registry and from every back-stack."""
+        entry = self._pages.pop(name, None)
+        if entry is None:
+            return
+        stacked_widget, page = entry
+        history = self._history.get(stacked_widget)
+        if history:
+            self._history[stacked_widget] = [previous for previous in history if previous is not page]
+        self.logger.debug("Unregistered page: %s", name)
+
+    def has(self, name):
+        """Return True if a page is registered under the name."""
+        return name in self._pages
+
+    def page(self, name):
+        """Return the page registered under the name, or None."""
+        entry = self._pages.get(name)
+        return entry[1] if entry else None
+
+    def stacked_widget(self, name):
+        """Return the stacked widget holding the named page, or None."""
+        entry = self._pages.get(name)
+        return entry[0] if entry else None
+
+    def navigate(self, name, remember=True):
+        """
+        Switch to a registered page.
+
+        Args:
+            name (str): The name of the page to show.
+            remember (bool): Push the current page onto the back-stack.
+
+        Returns:
+            bool: True if the page was found and shown.
+        """
+        entry = self._pages.get(name)
+        if entry is None:
+            self.logger.error(f"Cannot navigate - page not registered: {name}")
+            return False
+
+        stacked_widget, page = entry
+        current = stacked_widget.currentWidget()
+        if remember and current is not None and current is not page:
+            history = self._history.setdefault(stacked_widget, [])
+            history.append(current)
+            del history[:-self.MAX_HISTORY]
+        stacked_widget.setCurrentWidget(page)
+        self.logger.debug("Navigated to page: %s", name)
+        return True
+
+    def back(self, stacked_widget=None, default=None):
+        """
+        Return to the previous page of a stacked widget.
+
+        Args:
+            stacked_widget (QStackedWidget, optional): The stacked widget to go
+                back in. Defaults to the one holding the default page.
+            default (str, optional): Page to show when the back-stack is empty.
+
+        Returns:
+            bool: True if a page was shown.
+        """
+        if stacked_widget is None:
+            stacked_widget = self.stacked_widget(default)
+        if stacked_widget is None:
+            self.logger.error("Cannot go back - no stacked widget given")
+            return False
+
+        history = self._history.get(stacked_widget, [])
+        while history:
+            previous = history.pop()
+            # Skip pages removed from the stack since they were visited
+            if stacked_widget.indexOf(previous) != -1:
+                stacked_widget.setCurrentWidget(previous)
+                return True
+
+        if default is not None:
+            return self.navigate(default, remember=False)
+        return False
+
+    def clear_history(self, stacked_widget=None):
+        """Forget the back-stack of one stacked widget, or of all of them."""
+        if stacked_widget is None:
+            self._history.clear()
+        else:
+            self._history.pop(stacked_widget, None)
+
+
+def get_router(main_window):
+    """
+    Return the router shared by all screens of a main window, creating it on first use.
+
+    Args:
+        main_window: The application's main window.
+
+    Returns:
+        NavigationRouter: The shared router.
+    """
+    router = getattr(main_window, 'navigation_router', None)
+    if router is None:
+        router = NavigationRouter()
+        main_window.navigation_router = router
+    return router
+
+
+def back_to_calibration(main_window):
+    """
+    Go back from a calibration sub-page, to the main calibration page if there is no history.
+
+    The calibration screen's landing page is registered on first use; later
+    back presses are a registry lookup.
+
+    Args:
+        main_window: The application's main window, with a calibrate_screen.
+
+    Returns:
+        bool: True if a page was shown.
+    """
+    router = get_router(main_window)
+    if not router.has(MAIN_CALIBRATE_PAGE):
+        calibrate_screen = getattr(main_window, 'calibrate_screen', None)
+        if calibrate_screen is None:
+            router.logger.error("Cannot return to main calibration - main_window.calibrate_screen not found")
+            return False
+        stacked_widget = getattr(calibrate_screen, 'calibration_stacked_widget', None)
+        main_page = getattr(calibrate_screen, 'main_calibrate_page', None)
+        if stacked_widget is None or main_page is None:
+            router.logger.error("Cannot return to main calibration - required widgets not found")
+            return False
+        router.register(MAIN_CALIBRATE_PAGE, stacked_widget, main_page)
+    return router.back(default=MAIN_CALIBRATE_PAGE)
@@ -1,19 +1,29 @@
-from PyQt5 import uic
 from PyQt5.QtWidgets import QWidget, QPushButton, QDoubleSpinBox, QLabel
-from PyQt5.QtGui import QPalette, QColor
 from utils.helpers import check_ui_elements
-from utils.logger import setup_logger
+from async_logging import setup_logger
 from utils import dialog
 from utils import logger
+from ui_cache import load_ui
+from navigation_router import back_to_calibration
+from gcode_dispatcher import get_dispatcher
+from offset_coalescer import OffsetCoalescer
+from printer_state import get_printer_state
+from calibration_journal import get_calibration_journal
+from theme_engine import get_theme
+from startup_profiler import get_profiler
 class NozzleOffsetPage(QWidget):
     """
     Nozzle Offset configuration page that allows users to adjust and set the
     offset values for the printer's nozzle.
     """
+    UI_FILE = '/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui/calibrate_screen/nozzleOffsetPage/nozzleOffsetPage.ui'
+
     def __init__(self, main_window):
         super(NozzleOffsetPage, self).__init__()
         self.main_window = main_window
         self.current_nozzle_offset = 0.0
+        # Last offset the printer accepted or reported; edits that fail fall back to it
+        self.confirmed_nozzle_offset = 0.0
         
         # Set up logger for this class
         self.logger = setup_logger('NozzleOffsetPage')
@@ -21,7 +31,8 @@ class NozzleOffsetPage(QWidget):
 
         # Load the UI
         try:
-            uic.loadUi('/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui/calibrate_screen/nozzleOffsetPage/nozzleOffsetPage.ui', self)
+            with get_profiler().stage('loadUi', page='NozzleOffsetPage'):
+                load_ui(self.UI_FILE, self)
             self.logger.info("NozzleOffsetPage UI loaded successfully")
         except Exception as e:
             self.logger.error(f"Failed to load NozzleOffsetPage UI file: {e}", exc_info=True)
@@ -33,21 +44,38 @@ class NozzleOffsetPage(QWidget):
         self.currentNozzleOffsetLabel = self.findChild(QLabel, "currentNozzleOffset_2")
 
         # Validate UI elements
-        check_ui_elements(self, [
-            self.nozzleOffsetBackButton, self.nozzleOffsetSetButton,
-            self.nozzleOffsetDoubleSpinBox, self.currentNozzleOffsetLabel
-        ], "Nozzle Offset Page")
+        with get_profiler().stage('check_ui_elements', page='NozzleOffsetPage'):
+            check_ui_elements(self, [
+                self.nozzleOffsetBackButton, self.nozzleOffsetSetButton,
+                self.nozzleOffsetDoubleSpinBox, self.currentNozzleOffsetLabel
+            ], "Nozzle Offset Page")
 
         # Connect buttons to their respective methods
         if self.nozzleOffsetBackButton:
             self.nozzleOffsetBackButton.clicked.connect(self._return_to_main_calibration)
         if self.nozzleOffsetSetButton:
-            self.nozzleOffsetSetButton.clicked.connect(lambda: self.setZProbeOffset(self.nozzleOffsetDoubleSpinBox.value())))
+            self.nozzleOffsetSetButton.clicked.connect(lambda: self.setZProbeOffset(self.nozzleOffsetDoubleSpinBox.value()))
+
+        # Start from the printer's real offset (or the last one applied, until it reports it),
+        # and keep it current from the push stream
+        self.calibration_journal = get_calibration_journal(self.main_window)
+        self.printer_state = get_printer_state(self.main_window)
+        self.printer_state.probeOffsetChanged.connect(self._on_probe_offset_changed)
+        if self.printer_state.z_probe_offset is not None:
+            self.current_nozzle_offset = self.printer_state.z_probe_offset
+        else:
+            self.current_nozzle_offset = self.calibration_journal.last_known('M851').get('Z', 0.0)
+        self.confirmed_nozzle_offset = self.current_nozzle_offset
 
         # Initialize the current nozzle offset display
         if self.currentNozzleOffsetLabel:
-            self.currentNozzleOffsetLabel.setText(f"{self.current_nozzle_offset:.2f} mm")
+            self._show_nozzle_offset()
             
+        # Merge rapid Set presses into a single M851 and M500
+        self.offset_coalescer = OffsetCoalescer(get_dispatcher(self.main_window), 'M851', parent=self)
+        self.offset_coalescer.committed.connect(self._on_z_probe_offset_committed)
+        self.offset_coalescer.failed.connect(self._on_z_probe_offset_failed)
+
         # Configure spinbox if it exists
         if self.nozzleOffsetDoubleSpinBox:
             self._configure_spinbox(self.nozzleOffsetDoubleSpinBox)
@@ -55,17 +83,10 @@ class NozzleOffsetPage(QWidget):
     def _return_to_main_calibration(self):
         """Return to the main calibration page when back button is pressed"""
         self.logger.info("Returning to main calibration page")
-        if hasattr(self.main_window, 'calibrate_screen'):
-            # Use the standard navigation logic in CalibrateScreen
-            if hasattr(self.main_window.calibrate_screen, 'calibration_stacked_widget') and \
-               hasattr(self.main_window.calibrate_screen, 'main_calibrate_page'):
-                self.main_window.calibrate_screen.calibration_stacked_widget.setCurrentWidget(
-                    self.main_window.calibrate_screen.main_calibrate_page)
-                self.logger.debug("Successfully switched to main calibration page")
-            else:
-                self.logger.error("Cannot return to main calibration - required widgets not found")
-        else:
-            self.logger.error("Cannot return to main calibration - main_window.calibrate_screen not found")
+        # Don't hold back an edit still in its settle window
+        self.offset_coalescer.flush()
+        if back_to_calibration(self.main_window):
+            self.logger.debug("Successfully switched to main calibration page")
 
     def _set_nozzle_offset(self):
         """Set the nozzle offset based on the value in the spin box."""
@@ -87,9 +108,8 @@ class NozzleOffsetPage(QWidget):
         if spinbox and spinbox.lineEdit():
             spinbox.lineEdit().setReadOnly(True)
             spinbox.lineEdit().setDisabled(True)
-            palette = QPalette()
-            palette.setColor(QPalette.Highlight, QColor(40, 40, 40))
-            spinbox.lineEdit().setPalette(palette)
+            with get_profiler().stage('stylesheet', page='NozzleOffsetPage'):
+                get_theme().apply(spinbox.lineEdit(), 'offsetSpinBox')
             self.logger.debug("Spinbox configured with custom styling")
         else:
             self.logger.warning("Cannot configure spinbox - invalid reference")
@@ -98,16 +118,46 @@ class NozzleOffsetPage(QWidget):
         """Sets Z Probe offset from spinbox and updates UI accordingly."""
         try:
             rounded_offset = round(float(offset), 2)
-            logger.info(f"Setting Z Probe Offset to: {rounded_offset} mm")
+            # The spin box holds an adjustment; the printer is sent the resulting offset
+            self.current_nozzle_offset = round(self.current_nozzle_offset + rounded_offset, 2)
+            logger.info(f"Adjusting Z Probe Offset by {rounded_offset} mm to: {self.current_nozzle_offset} mm")
 
-            # Send G-code commands
-            self.main_window.octoprint_client.gcode(command=f'M851 Z{rounded_offset}')  
-            self.main_window.octoprint_client.gcode(command='M500')  
+            # Rapid presses are merged into one M851 and one EEPROM save; only the latest offset is sent
+            self.offset_coalescer.set('Z', self.current_nozzle_offset)
 
-            # Reset spin box and update UI
+            # Reset spin box and show the new offset as pending until the printer saved it
             self.nozzleOffsetDoubleSpinBox.setValue(0)
-            current_offset = float(self.currentNozzleOffset.text()) + rounded_offset
-            self.currentNozzleOffset.setText(f"{current_offset:.2f} mm")  
+            self._show_nozzle_offset(pending=True)
         except Exception as e:
             logger.error("Error in MainUiClass.setZProbeOffset: {}".format(e))
             dialog.WarningOk(self, "Error in MainUiClass.setZProbeOffset: {}".format(e), overlay=True)
+
+    def _show_nozzle_offset(self, pending=False):
+        """Display the current nozzle offset, marked while it is not saved yet."""
+        suffix = " (pending)" if pending else ""
+        self.currentNozzleOffsetLabel.setText(f"{self.current_nozzle_offset:.2f} mm{suffix}")
+
+    def _on_probe_offset_changed(self, axis, offset):
+        """Show the Z probe offset reported by the printer unless an edit is still pending."""
+        if axis != 'Z':
+            return
+        self.confirmed_nozzle_offset = offset
+        if not self.offset_coalescer.pending_values():
+            self.current_nozzle_offset = offset
+            self._show_nozzle_offset()
+
+    def _on_z_probe_offset_committed(self, values):
+        """Journal the saved offset and clear the pending marker once no offset is waiting to be saved."""
+        self.calibration_journal.record_offsets('M851', 0, values)
+        if 'Z' in values:
+            self.confirmed_nozzle_offset = values['Z']
+        if not self.offset_coalescer.pending_values():
+            self._show_nozzle_offset()
+
+    def _on_z_probe_offset_failed(self, e):
+        """Report a Z probe offset command that failed in the background and show the offset still in effect."""
+        logger.error("Error in MainUiClass.setZProbeOffset: {}".format(e))
+        # Later adjustments must build on what the printer has, not on the rejected value
+        self.current_nozzle_offset = self.confirmed_nozzle_offset
+        self._show_nozzle_offset()
+        dialog.WarningOk(self, "Error in MainUiClass.setZProbeOffset: {}".format(e), overlay=True)
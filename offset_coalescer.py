@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from async_logging import setup_logger
+
+
+class OffsetCoalescer(QObject):
+    """
+    Merges rapid offset edits into a single offset command and EEPROM save.
+
+    ToolOffsetMatrix (tool_offsets) offers the same interface for per-tool
+    offsets: the pendingChanged/committed/failed signals, pending_values(),
+    flush(), settle_ms and writes_saved.
+
+    Every edit restarts a settle timer. When the timer expires the latest value
+    of each edited axis is sent as one command, e.g. "M218 T1 X0.1 Y-0.2",
+    followed by one M500, in a single batch. Values stay pending until the
+    printer has accepted the save.
+    """
+    # axis -> value, for all values not yet confirmed by the printer
+    pendingChanged = pyqtSignal(dict)
+    # axis -> value, for the values the printer accepted
+    committed = pyqtSignal(dict)
+    # the exception raised while sending
+    failed = pyqtSignal(object)
+
+    SETTLE_MS = 1000
+
+    def __init__(self, dispatcher, command, settle_ms=SETTLE_MS, parent=None):
+        """
+        Args:
+            dispatcher (GcodeDispatcher): Dispatcher used to send the batch.
+            command (str): The offset command and fixed arguments, e.g. "M218 T1" or "M851".
+            settle_ms (int): How long to wait after the last edit before sending.
+            parent (QObject, optional): Qt parent.
+        """
+        super(OffsetCoalescer, self).__init__(parent)
+        self.dispatcher = dispatcher
+        self.command = command
+        self.logger = setup_logger('offset_coalescer')
+
+        # Edits not sent yet, and edits sent but not confirmed
+        self._pending = OrderedDict()
+        self._in_flight = {}
+
+        # Printer writes avoided by merging edits (each merged edit saves an offset command and an M500)
+        self.writes_saved = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(settle_ms)
+        self._timer.timeout.connect(self.flush)
+
+    @property
+    def settle_ms(self):
+        """How long edits are held after the last one before they are sent."""
+        return self._timer.interval()
+
+    @settle_ms.setter
+    def settle_ms(self, settle_ms):
+        self._timer.setInterval(settle_ms)
+
+    def set(self, axis, value):
+        """
+        Record a new offset for an axis and restart the settle window.
+
+        Args:
+            axis (str): "X", "Y" or "Z".
+            value (float): The offset to send.
+        """
+        if self._pending:
+            # Without coalescing this edit would have been its own offset command and M500
+            self.writes_saved += 2
+        self._pending[axis] = value
+        self._timer.start()
+        self.pendingChanged.emit(self.pending_values())
+
+    def pending_values(self):
+        """Return every value not yet confirmed by the printer, newest edits first."""
+        values = dict(self._in_flight)
+        values.update(self._pending)
+        return values
+
+    def flush(self):
+        """Send the pending edits now instead of waiting for the settle window."""
+        self._timer.stop()
+        if not self._pending:
+            return
+
+        values = dict(self._pending)
+        self._pending.clear()
+        self._in_flight.update(values)
+        arguments = ' '.join(f'{axis}{value}' for axis, value in values.items())
+        self.logger.info(f"Sending coalesced offset: {self.command} {arguments} ({self.writes_saved} writes saved so far)")
+        self.dispatcher.send_batch(
+            [f'{self.command} {arguments}', 'M500'],
+            on_success=lambda _: self._on_committed(values),
+            on_failure=lambda e: self._on_failed(values, e))
+
+    def _forget_in_flight(self, values):
+        for axis, value in values.items():
+            if self._in_flight.get(axis) == value:
+                del self._in_flight[axis]
+
+    def _on_committed(self, values):
+        self._forget_in_flight(values)
+        self.committed.emit(values)
+        self.pendingChanged.emit(self.pending_values())
+
+    def _on_failed(self, values, e):
+        self._forget_in_flight(values)
+        self.failed.emit(e)
+        self.pendingChanged.emit(self.pending_values())
@@ -0,0 +1,83 @@
+import os
+from collections import OrderedDict
+from async_logging import setup_logger
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """Return the resident memory of this process in bytes, or 0 if unknown."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class PageCache(object):
+    """
+    Least-recently-viewed bookkeeping for built pages, with a budget.
+
+    The budget is a maximum number of pages and, optionally, a maximum total of
+    the pages' estimated memory (the process's RSS growth while each page was
+    built). When a view pushes the cache over budget, the least recently viewed
+    pages are handed to on_evict until it fits again. The page viewed last is
+    never evicted.
+    """
+    def __init__(self, on_evict, max_pages=8, max_bytes=None):
+        """
+        Args:
+            on_evict (callable): Called with the name of each page to tear down.
+            max_pages (int, optional): Maximum number of pages kept; None for no limit.
+            max_bytes (int, optional): Maximum estimated memory of the kept pages.
+        """
+        self.on_evict = on_evict
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.logger = setup_logger('page_cache')
+        self._sizes = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self._sizes
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def total_bytes(self):
+        """Return the estimated memory of all kept pages."""
+        return sum(self._sizes.values())
+
+    def touch(self, name, size=None):
+        """
+        Record a view of a page, making it the most recently used, and enforce the budget.
+
+        Args:
+            name (str): The page name.
+            size (int, optional): Estimated memory of the page in bytes.
+        """
+        if size is None:
+            size = self._sizes.get(name, 0)
+        self._sizes[name] = size
+        self._sizes.move_to_end(name)
+        self._enforce(keep=name)
+
+    def discard(self, name):
+        """Forget a page without evicting it (e.g. it was removed elsewhere)."""
+        self._sizes.pop(name, None)
+
+    def _over_budget(self):
+        if self.max_pages is not None and len(self._sizes) > self.max_pages:
+            return True
+        return self.max_bytes is not None and self.total_bytes() > self.max_bytes
+
+    def _enforce(self, keep):
+        while self._over_budget() and len(self._sizes) > 1:
+            name = next(iter(self._sizes))
+            if name == keep:
+                break
+            del self._sizes[name]
+            self.logger.info(f"Evicting page {name} ({len(self._sizes)} pages, {self.total_bytes() // 1024} KiB kept)")
+            try:
+                self.on_evict(name)
+            except Exception as e:
+                self.logger.error(f"Error evicting page {name}: {e}")
@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from async_logging import setup_logger
+
+
+class PageScheduler(QObject):
+    """
+    Builds queued pages a few at a time on idle turns of the event loop.
+
+    Each slice builds pages in queue order while the next page is expected to
+    fit in the frame budget (always at least one page), then yields so input
+    and painting are handled before the next slice. A page can be moved to the
+    front of the queue, e.g. when the user opens it before it was built.
+    """
+    # name of each page built (or failed), in build order
+    pageBuilt = pyqtSignal(str)
+    # the queue ran empty
+    finished = pyqtSignal()
+
+    BUDGET_MS = 16
+
+    def __init__(self, build, budget_ms=BUDGET_MS, parent=None):
+        """
+        Args:
+            build (callable): Called with a page name to build that page.
+            budget_ms (float): Time per slice, e.g. one 60 Hz frame.
+            parent (QObject, optional): Qt parent.
+        """
+        super(PageScheduler, self).__init__(parent)
+        self.build = build
+        self.budget = budget_ms / 1000.0
+        self.logger = setup_logger('page_scheduler')
+        self._queue = OrderedDict()
+
+        # Running average build time of one page, used to predict whether the next one fits
+        self._average = 0.0
+
+        # Slices run so far, and slices that went over budget (a single slow page)
+        self.slices = 0
+        self.overruns = 0
+
+        # Interval 0: fires once the event loop has no other events to process
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._run_slice)
+
+    def __contains__(self, name):
+        return name in self._queue
+
+    def __len__(self):
+        return len(self._queue)
+
+    def add(self, name):
+        """Queue a page to be built on a later idle turn."""
+        self._queue[name] = None
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def promote(self, name):
+        """Move a queued page to the front so it is built in the next slice."""
+        if name in self._queue:
+            self._queue.move_to_end(name, last=False)
+            self.logger.debug("Promoted page: %s", name)
+
+    def discard(self, name):
+        """Remove a page from the queue without building it."""
+        self._queue.pop(name, None)
+
+    def flush(self):
+        """Build every queued page now."""
+        while self._queue:
+            self._build_next()
+        self._idle()
+
+    def _build_next(self):
+        name, _ = self._queue.popitem(last=False)
+        start = time.perf_counter()
+        try:
+            self.build(name)
+        except Exception as e:
+            self.logger.error(f"Error building page {name}: {e}")
+        duration = time.perf_counter() - start
+        self._average = duration if not self._average else 0.8 * self._average + 0.2 * duration
+        self.pageBuilt.emit(name)
+
+    def _run_slice(self):
+        start = time.perf_counter()
+        while self._queue:
+            self._build_next()
+            if time.perf_counter() - start + self._average > self.budget:
+                break
+        self.slices += 1
+        elapsed = time.perf_counter() - start
+        if elapsed > self.budget:
+            self.overruns += 1
+            self.logger.debug("Slice took %.1f ms (budget %.1f ms)", elapsed * 1000, self.budget * 1000)
+        if not self._queue:
+            self._idle()
+
+    def _idle(self):
+        self._timer.stop()
+        self.finished.emit()
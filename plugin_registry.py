@@ -0,0 +1,197 @@
+import os
+import re
+import sys
+import json
+import py_compile
+import importlib.util
+from collections import namedtuple
+from async_logging import setup_logger
+
+SETTINGS_FOLDER = '/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui/settings_screen'
+MANIFEST_PATH = os.path.expanduser('~/.cache/octoprint_ControlCenter/settings_plugins.json')
+MANIFEST_VERSION = 2
+
+# Backends are imported as <MODULE_PREFIX>_<subfolder>
+MODULE_PREFIX = 'controlcenter_settings_plugin'
+
+logger = setup_logger('plugin_registry')
+
+
+class PluginEntry(namedtuple('PluginEntry', ['name', 'ui_file', 'py_file', 'class_name', 'module_name'])):
+    """A settings plugin: a subfolder holding <name>.ui and <name>.py."""
+    __slots__ = ()
+
+
+def module_name_for(py_file):
+    """
+    Return the stable, unique module name a plugin backend is imported under.
+
+    Args:
+        py_file (str): The path to the backend .py file.
+
+    Returns:
+        str: The module name.
+    """
+    name = os.path.splitext(os.path.basename(py_file))[0]
+    return f"{MODULE_PREFIX}_{re.sub(r'[^0-9A-Za-z_]', '_', name)}"
+
+
+def class_name_for(name):
+    """Return the backend class name for a subfolder, e.g. "wifi_settings" -> "WifiSettings"."""
+    return name.title().replace('_', '')
+
+
+def load_backend_module(py_file):
+    """
+    Import a plugin backend under its own module name.
+
+    The module is registered in sys.modules, so repeated loads reuse it and
+    plugins no longer overwrite each other. The source loader reads and
+    writes __pycache__ bytecode as for any regular import.
+
+    Args:
+        py_file (str): The path to the backend .py file.
+
+    Returns:
+        module: The imported backend module.
+    """
+    module_name = module_name_for(py_file)
+    module = sys.modules.get(module_name)
+    if module is not None and getattr(module, '__file__', None) == py_file:
+        return module
+
+    spec = importlib.util.spec_from_file_location(module_name, py_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(module_name, None)
+        raise
+    return module
+
+
+class PluginRegistry(object):
+    """
+    Discovers settings plugins and caches the result in a manifest.
+
+    The manifest records the modification time of the settings folder and of
+    every subfolder, plugin or not. Adding or removing a subfolder changes the
+    folder's mtime, and adding, removing or renaming files in a subfolder
+    changes its own mtime (e.g. a .py added next to a lone .ui), so a manifest
+    that still matches can be trusted without listing directories or probing
+    for files.
+    """
+    def __init__(self, settings_folder=SETTINGS_FOLDER, manifest_path=None):
+        self.settings_folder = settings_folder
+        self.manifest_path = manifest_path or MANIFEST_PATH
+        self.entries = []
+
+    def discover(self):
+        """
+        Return the installed plugins, from the manifest when it is still valid.
+
+        Returns:
+            list: PluginEntry for every subfolder with matching .ui and .py files.
+        """
+        entries = self._read_manifest()
+        if entries is None:
+            entries, subfolders = self._scan()
+            self._write_manifest(entries, subfolders)
+        self.entries = entries
+        return entries
+
+    def _scan(self):
+        """
+        List the settings folder and collect plugin entries.
+
+        Returns:
+            tuple: (PluginEntry list, paths of every subfolder seen)
+        """
+        entries, subfolders = [], []
+        for subfolder in sorted(os.listdir(self.settings_folder)):
+            subfolder_path = os.path.join(self.settings_folder, subfolder)
+            if not os.path.isdir(subfolder_path):
+                continue
+            subfolders.append(subfolder_path)
+            ui_file = os.path.join(subfolder_path, f'{subfolder}.ui')
+            py_file = os.path.join(subfolder_path, f'{subfolder}.py')
+            if os.path.exists(ui_file) and os.path.exists(py_file):
+                entries.append(PluginEntry(subfolder, ui_file, py_file,
+                                           class_name_for(subfolder), module_name_for(py_file)))
+        logger.info(f"Scanned {self.settings_folder}: {len(entries)} plugins in {len(subfolders)} subfolders")
+        return entries, subfolders
+
+    def _mtimes(self, folders):
+        """Return the current mtimes of the settings folder and the given subfolders."""
+        mtimes = {self.settings_folder: os.stat(self.settings_folder).st_mtime_ns}
+        for folder in folders:
+            mtimes[folder] = os.stat(folder).st_mtime_ns
+        return mtimes
+
+    def _read_manifest(self):
+        """Return the manifest's entries if it matches the folder on disk, else None."""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') != MANIFEST_VERSION or manifest.get('folder') != self.settings_folder:
+                return None
+            entries = [PluginEntry(*entry) for entry in manifest['entries']]
+            # A subfolder removed since the scan changes the folder's mtime (or fails the stat)
+            subfolders = [folder for folder in manifest['mtimes'] if folder != self.settings_folder]
+            if self._mtimes(subfolders) != manifest['mtimes']:
+                logger.info("Plugin manifest is stale, rescanning")
+                return None
+            return entries
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_manifest(self, entries, subfolders):
+        """Store the entries with the current mtimes of the folder and every subfolder."""
+        try:
+            manifest = {
+                'version': MANIFEST_VERSION,
+                'folder': self.settings_folder,
+                'mtimes': self._mtimes(subfolders),
+                'entries': [list(entry) for entry in entries],
+            }
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = f'{self.manifest_path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"Could not write plugin manifest: {e}")
+
+    def prewarm(self, include_ui=True):
+        """
+        Compile every plugin ahead of time: backend bytecode and, optionally, the .ui cache.
+
+        Args:
+            include_ui (bool): Also precompile the plugins' .ui files.
+
+        Returns:
+            dict: Maps each compiled file to None on success or the exception raised.
+        """
+        results = {}
+        entries = self.entries or self.discover()
+        for entry in entries:
+            try:
+                py_compile.compile(entry.py_file, doraise=True)
+                results[entry.py_file] = None
+            except (OSError, py_compile.PyCompileError) as e:
+                logger.error(f"Failed to compile {entry.py_file}: {e}")
+                results[entry.py_file] = e
+        if include_ui:
+            from ui_cache import precompile
+            for ui_file, result in precompile([entry.ui_file for entry in entries]).items():
+                results[ui_file] = result if isinstance(result, Exception) else None
+        return results
+
+
+if __name__ == '__main__':
+    folder = sys.argv[1] if len(sys.argv) > 1 else SETTINGS_FOLDER
+    failures = [path for path, result in PluginRegistry(folder).prewarm().items() if result is not None]
+    for path in failures:
+        print(f"failed   {path}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,174 @@
+import re
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from async_logging import setup_logger
+from gcode_dispatcher import get_dispatcher
+
+# "M218 T1 X25.00 Y0.00 Z0.000", as echoed by M503 or sent by us
+_M218 = re.compile(r'\bM218\s+T(?P<tool>\d+)(?P<args>(?:\s+[XYZ]-?\d+(?:\.\d+)?)+)', re.IGNORECASE)
+# "M851 X0.00 Y0.00 Z-1.50" or "M851 Z-1.50"
+_M851 = re.compile(r'\bM851(?P<args>(?:\s+[XYZ]-?\d+(?:\.\d+)?)+)', re.IGNORECASE)
+# "Probe Offset X0.00 Y0.00 Z-1.50" (M851 without arguments)
+_PROBE_OFFSET = re.compile(r'Probe Offset(?P<args>(?:\s+[XYZ]:?\s*-?\d+(?:\.\d+)?)+)', re.IGNORECASE)
+# "Hotend offsets: 0.00,0.00,0.00 25.00,0.00,0.00" (M218 without arguments)
+_HOTEND_OFFSETS = re.compile(r'Hotend offsets:\s*(?P<offsets>.*)', re.IGNORECASE)
+_AXIS_VALUE = re.compile(r'([XYZ]):?\s*(-?\d+(?:\.\d+)?)', re.IGNORECASE)
+
+
+def _parse_axes(args):
+    """Return {"X": float, ...} for the axis arguments in a G-code parameter string."""
+    return {axis.upper(): float(value) for axis, value in _AXIS_VALUE.findall(args)}
+
+
+class PrinterStateCache(QObject):
+    """
+    Live cache of printer state fed from OctoPrint's push updates.
+
+    OctoPrint's "current" push messages carry the terminal log lines. Lines are
+    parsed as they arrive for tool offsets (M218), the Z probe offset (M851)
+    and the M503 settings report, so pages can show the printer's real values
+    without their own round trip. Parsing runs on the GUI thread, whatever
+    thread the push message arrives on.
+    """
+    # tool, axis ("X"/"Y"/"Z"), value
+    toolOffsetChanged = pyqtSignal(int, str, float)
+    # tool, axis, value: every tool offset the firmware reported (M503/M218), changed or not
+    toolOffsetReported = pyqtSignal(int, str, float)
+    # axis ("X"/"Y"/"Z"), value
+    probeOffsetChanged = pyqtSignal(str, float)
+
+    _linesReceived = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super(PrinterStateCache, self).__init__(parent)
+        self.logger = setup_logger('printer_state')
+        self.tool_offsets = {}
+        self.probe_offset = {}
+        self._partial = ''
+        self._linesReceived.connect(self._feed_lines)
+
+    def tool_offset(self, tool, axis, default=None):
+        """Return the last known offset of a tool along an axis."""
+        return self.tool_offsets.get(tool, {}).get(axis, default)
+
+    @property
+    def z_probe_offset(self):
+        """The last known Z probe offset, or None."""
+        return self.probe_offset.get('Z')
+
+    def subscribe(self, client):
+        """
+        Receive OctoPrint "current" push payloads from a client.
+
+        The client must offer add_current_listener(callback), calling callback
+        (from any thread) with every "current" payload of its push/socket
+        connection.
+
+        Args:
+            client: The OctoPrint client.
+
+        Returns:
+            bool: False if the client has no push subscription, so the cache will not be fed.
+        """
+        add_listener = getattr(client, 'add_current_listener', None)
+        if not callable(add_listener):
+            return False
+        add_listener(self.handle_current)
+        return True
+
+    def handle_current(self, payload):
+        """
+        Feed an OctoPrint "current" push payload (any thread).
+
+        Args:
+            payload (dict): The payload; its "logs" list holds terminal lines.
+        """
+        logs = payload.get('logs') if payload else None
+        if logs:
+            self._linesReceived.emit(list(logs))
+
+    def feed(self, text):
+        """Feed raw serial text; incomplete trailing lines are kept for the next call (GUI thread)."""
+        text = self._partial + text
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        self._feed_lines(lines)
+
+    @pyqtSlot(list)
+    def _feed_lines(self, lines):
+        for line in lines:
+            self.feed_line(line)
+
+    def feed_line(self, line):
+        """Parse one terminal or serial line and update the cache."""
+        # Our own commands appear as "Send: ...", firmware output as "Recv: ..."
+        reported = not line.startswith('Send: ')
+        if line.startswith('Send: ') or line.startswith('Recv: '):
+            line = line[6:]
+        if 'M218' not in line and 'M851' not in line and 'offset' not in line.lower():
+            return
+
+        match = _M218.search(line)
+        if match:
+            for axis, value in _parse_axes(match.group('args')).items():
+                self._set_tool_offset(int(match.group('tool')), axis, value, reported)
+            return
+
+        match = _M851.search(line) or _PROBE_OFFSET.search(line)
+        if match:
+            for axis, value in _parse_axes(match.group('args')).items():
+                self._set_probe_offset(axis, value)
+            return
+
+        match = _HOTEND_OFFSETS.search(line)
+        if match:
+            for tool, triple in enumerate(match.group('offsets').split()):
+                try:
+                    values = [float(value) for value in triple.split(',')]
+                except ValueError:
+                    continue
+                for axis, value in zip('XYZ', values):
+                    self._set_tool_offset(tool, axis, value, reported)
+
+    def _set_tool_offset(self, tool, axis, value, reported=False):
+        offsets = self.tool_offsets.setdefault(tool, {})
+        if offsets.get(axis) != value:
+            offsets[axis] = value
+            self.logger.debug("Tool %s %s offset is now %s", tool, axis, value)
+            self.toolOffsetChanged.emit(tool, axis, value)
+        if reported:
+            self.toolOffsetReported.emit(tool, axis, value)
+
+    def _set_probe_offset(self, axis, value):
+        if self.probe_offset.get(axis) != value:
+            self.probe_offset[axis] = value
+            self.logger.debug("Probe %s offset is now %s", axis, value)
+            self.probeOffsetChanged.emit(axis, value)
+
+    def request_refresh(self, dispatcher):
+        """Ask the printer to report its settings; the answer arrives through the push stream."""
+        dispatcher.send('M503')
+
+
+def get_printer_state(main_window):
+    """
+    Return the printer-state cache of a main window, creating it on first use.
+
+    The cache subscribes to the "current" push payloads of the main window's
+    octoprint_client (see PrinterStateCache.subscribe). The first time the
+    cache is created, the printer is asked once for its settings report (M503).
+
+    Args:
+        main_window: The application's main window.
+
+    Returns:
+        PrinterStateCache: The shared cache.
+    """
+    state = getattr(main_window, 'printer_state', None)
+    if state is None:
+        state = PrinterStateCache()
+        main_window.printer_state = state
+        if not state.subscribe(getattr(main_window, 'octoprint_client', None)):
+            state.logger.warning("OctoPrint client offers no push subscription (add_current_listener); "
+                                 "printer values will not be read back")
+        state.request_refresh(get_dispatcher(main_window))
+    return state
@@ -0,0 +1,196 @@
+"""
+Plans the restarts needed after system files change, instead of rebooting.
+
+Each changed path is mapped to the services that read it (the network stack,
+WiFi, OctoPrint). Only those services are restarted, in dependency order, and
+each one is health-checked before the next starts. A full reboot is planned
+only when a changed path is not owned by any known service; callers fall back
+to one when a restart or health check fails. Services that are not present on
+the machine (e.g. WiFi without a wlan0 interface) are skipped.
+
+    planner = RestartPlanner()
+    plan = planner.plan(['/etc/dhcpcd.conf', '/home/pi/.octoprint/config.yaml'])
+    plan.services                            # ['network', 'octoprint']
+    steps = planner.steps(plan)              # JobSteps: restart + health check per service
+"""
+import os
+import time
+import subprocess
+import urllib.error
+import urllib.request
+from collections import OrderedDict, namedtuple
+from async_logging import setup_logger
+from background_jobs import JobStep, StepFailed, shell_step
+
+OCTOPRINT_URL = 'http://127.0.0.1:5000'
+WIFI_INTERFACE = 'wlan0'
+
+# A restartable service. restart is the command that restarts it, healthy a
+# callable returning True once it works again, after the services that must be
+# restarted (and healthy) before it, timeout the seconds allowed to get healthy,
+# present a callable returning False on machines without the service (None: always there).
+Service = namedtuple('Service', ['name', 'label', 'restart', 'healthy', 'after', 'timeout', 'present'])
+
+# What to do after files changed: the services to restart in order, whether a
+# reboot is needed instead, and why.
+RestartPlan = namedtuple('RestartPlan', ['services', 'reboot', 'reasons'])
+
+logger = setup_logger('restart_planner')
+
+
+def unit_active(unit):
+    """Return a health check that passes while a systemd unit is active."""
+    def check():
+        return subprocess.run(['systemctl', 'is-active', '--quiet', unit]).returncode == 0
+    return check
+
+
+def wifi_responding(interface=WIFI_INTERFACE):
+    """Return a health check that passes when wpa_supplicant answers on an interface."""
+    def check():
+        completed = subprocess.run(['sudo', 'wpa_cli', '-i', interface, 'ping'], stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, universal_newlines=True, timeout=5)
+        return completed.returncode == 0 and 'PONG' in completed.stdout
+    return check
+
+
+def interface_exists(interface):
+    """Return a check that passes when a network interface exists."""
+    def check():
+        return os.path.exists(os.path.join('/sys/class/net', interface))
+    return check
+
+
+def http_responding(url):
+    """Return a health check that passes when a server answers HTTP requests (any status)."""
+    def check():
+        try:
+            urllib.request.urlopen(url, timeout=5).close()
+        except urllib.error.HTTPError:
+            # e.g. 403 without an API key: the server is up
+            return True
+        except (urllib.error.URLError, OSError):
+            return False
+        return True
+    return check
+
+
+SERVICES = OrderedDict((service.name, service) for service in [
+    Service('network', "network", ['sudo', 'systemctl', 'restart', 'dhcpcd'],
+            unit_active('dhcpcd'), (), 30, None),
+    Service('wifi', "WiFi", ['sudo', 'wpa_cli', '-i', WIFI_INTERFACE, 'reconfigure'],
+            wifi_responding(), ('network',), 30, interface_exists(WIFI_INTERFACE)),
+    Service('octoprint', "OctoPrint", ['sudo', 'systemctl', 'restart', 'octoprint'],
+            http_responding(f'{OCTOPRINT_URL}/api/version'), ('network', 'wifi'), 120, None),
+])
+
+# Path (or directory prefix, ending in "/") -> services reading it
+FILE_SERVICES = [
+    ('/etc/dhcpcd.conf', ('network',)),
+    ('/etc/wpa_supplicant/', ('wifi',)),
+    ('/home/pi/.octoprint/', ('octoprint',)),
+]
+
+
+class RestartPlanner(object):
+    """Maps changed files to service restarts (see the module docstring)."""
+    def __init__(self, services=SERVICES, file_services=FILE_SERVICES, poll_interval=1.0):
+        """
+        Args:
+            services (OrderedDict): Service by name.
+            file_services (list): (path or directory prefix, service names) pairs.
+            poll_interval (float): Seconds between health checks.
+        """
+        self.services = services
+        self.file_services = file_services
+        self.poll_interval = poll_interval
+
+    def services_for(self, path):
+        """Return the names of the services reading a path, or None if no known service owns it."""
+        names = []
+        for owned, services in self.file_services:
+            if path == owned or (owned.endswith('/') and path.startswith(owned)):
+                names.extend(name for name in services if name not in names)
+        return names or None
+
+    def order(self, names):
+        """Return service names in dependency order (dependencies not in names are not added)."""
+        ordered = []
+
+        def visit(name, visiting):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Circular service dependency at {name}")
+            for dependency in self.services[name].after:
+                if dependency in names:
+                    visit(dependency, visiting | {name})
+            ordered.append(name)
+
+        for name in self.services:
+            if name in names:
+                visit(name, frozenset())
+        return ordered
+
+    def plan(self, changed_paths):
+        """
+        Plan the restarts activating changed files.
+
+        Args:
+            changed_paths (list): Absolute paths that were written or removed.
+
+        Returns:
+            RestartPlan: The services to restart in order, or reboot=True when
+            a path is not owned by any known service.
+        """
+        names, reasons, reboot = set(), [], False
+        for path in changed_paths:
+            services = self.services_for(path)
+            if services is None:
+                reboot = True
+                reasons.append(f"{path}: no known service, reboot required")
+                continue
+            present = [name for name in services if self.is_present(name)]
+            names.update(present)
+            reasons.append(f"{path}: {', '.join(present) or 'service not present, nothing to restart'}")
+        plan = RestartPlan(self.order(names), reboot, reasons)
+        logger.info(f"Restart plan: {'reboot' if reboot else ', '.join(plan.services) or 'nothing'} "
+                    f"({'; '.join(reasons)})")
+        return plan
+
+    def is_present(self, name):
+        """Return False for a service this machine does not have."""
+        present = self.services[name].present
+        return present is None or present()
+
+    def wait_healthy(self, service):
+        """Poll a service's health check until it passes; raise StepFailed after its timeout."""
+        deadline = time.monotonic() + service.timeout
+        while True:
+            try:
+                if service.healthy():
+                    return 0
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.debug("Health check of %s failed: %s", service.name, e)
+            if time.monotonic() >= deadline:
+                raise StepFailed(f"{service.label} not healthy {service.timeout}s after restart")
+            time.sleep(self.poll_interval)
+
+    def steps(self, plan):
+        """
+        Return the job steps carrying out a plan: restart, then health check, per service.
+
+        A plan requiring a reboot yields just the reboot step.
+        """
+        if plan.reboot:
+            return [self.reboot_step()]
+        steps = []
+        for name in plan.services:
+            service = self.services[name]
+            steps.append(shell_step(f"Restarting {service.label}", service.restart))
+            steps.append(JobStep(f"Checking {service.label}", lambda service=service: self.wait_healthy(service)))
+        return steps
+
+    def reboot_step(self):
+        """Return the full-reboot step used when services cannot be restarted individually."""
+        return shell_step("Rebooting", ['sudo', 'reboot'])
@@ -0,0 +1,152 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QSize, QRectF, pyqtSignal
+from PyQt5.QtGui import QColor, QLinearGradient, QPen
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLineEdit, QListView, QStyledItemDelegate, QStyle,
+                             QScroller, QScrollerProperties, QAbstractItemView)
+from theme_engine import get_theme
+
+# Role holding a row's plugin subfolder name
+NameRole = Qt.UserRole + 1
+
+
+class SettingsMenuModel(QAbstractListModel):
+    """One row per settings plugin, fed from plugin discovery."""
+    def __init__(self, parent=None):
+        super(SettingsMenuModel, self).__init__(parent)
+        self._entries = []
+
+    def set_entries(self, entries):
+        """
+        Replace the rows.
+
+        Args:
+            entries (list): PluginEntry tuples (or anything with a .name), in menu order.
+        """
+        self.beginResetModel()
+        self._entries = [(entry.name, entry.name.replace('_', ' ').title()) for entry in entries]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name, title = self._entries[index.row()]
+        if role == Qt.DisplayRole:
+            return title
+        if role == NameRole:
+            return name
+        return None
+
+
+class SettingsMenuDelegate(QStyledItemDelegate):
+    """
+    Paints a menu row like the former per-plugin buttons: a bordered, shaded bar with centred text.
+
+    The view only asks for rows that are visible, so painting cost does not grow
+    with the number of plugins.
+    """
+    ROW_HEIGHT = 100
+
+    BORDER = QColor(87, 87, 87)
+    # (bottom, top) gradient colours, normal and pressed/selected
+    SHADE = (QColor(180, 180, 180), QColor(255, 255, 255))
+    SHADE_PRESSED = (QColor('#dadbde'), QColor('#f6f7fa'))
+
+    def __init__(self, parent=None):
+        super(SettingsMenuDelegate, self).__init__(parent)
+        self._border_pen = QPen(self.BORDER)
+
+    def sizeHint(self, option, index):
+        # Full-width rows; the view re-lays out on resize (QListView.Adjust)
+        view = self.parent()
+        return QSize(view.viewport().width() - 2 * view.spacing(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = QRectF(option.rect).adjusted(0.5, 0.5, -0.5, -0.5)
+        bottom, top = self.SHADE_PRESSED if option.state & QStyle.State_Selected else self.SHADE
+        gradient = QLinearGradient(rect.topLeft(), rect.bottomLeft())
+        gradient.setColorAt(0.0, top)
+        gradient.setColorAt(0.19, top)
+        gradient.setColorAt(1.0, bottom)
+        painter.fillRect(rect, gradient)
+        painter.setPen(self._border_pen)
+        painter.drawRect(rect)
+        painter.setFont(option.font)
+        painter.setPen(option.palette.color(option.palette.ButtonText))
+        painter.drawText(option.rect, Qt.AlignCenter, index.data(Qt.DisplayRole))
+        painter.restore()
+
+
+class SettingsMenu(QWidget):
+    """
+    Searchable, kinetically scrolled list of settings plugins.
+
+    A QListView with uniform row sizes lays out and paints only the rows in
+    view, so hundreds of plugins scroll as smoothly as a handful. Typing in the
+    search box filters rows by title.
+    """
+    # the subfolder name of the tapped plugin
+    pageRequested = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super(SettingsMenu, self).__init__(parent)
+        self.model = SettingsMenuModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.searchBox = QLineEdit(self)
+        self.searchBox.setObjectName("settingsSearchBox")
+        self.searchBox.setPlaceholderText("Search settings")
+        self.searchBox.setClearButtonEnabled(True)
+        self.searchBox.textChanged.connect(self.set_filter)
+
+        self.listView = QListView(self)
+        self.listView.setObjectName("settingsMenuListView")
+        self.listView.setModel(self.proxy)
+        self.listView.setItemDelegate(SettingsMenuDelegate(self.listView))
+        self.listView.setUniformItemSizes(True)
+        self.listView.setSpacing(2)
+        self.listView.setResizeMode(QListView.Adjust)
+        self.listView.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.listView.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.listView.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.listView.clicked.connect(self._on_clicked)
+        get_theme().apply(self.listView, 'settingsMenu')
+        get_theme().apply(self.searchBox, 'settingsSearch')
+        self._enable_kinetic_scrolling()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.searchBox)
+        layout.addWidget(self.listView, 1)
+
+    def _enable_kinetic_scrolling(self):
+        """Flick-to-scroll with a finger (or mouse), without overshoot repaints."""
+        viewport = self.listView.viewport()
+        QScroller.grabGesture(viewport, QScroller.LeftMouseButtonGesture)
+        scroller = QScroller.scroller(viewport)
+        properties = scroller.scrollerProperties()
+        properties.setScrollMetric(QScrollerProperties.VerticalOvershootPolicy, QScrollerProperties.OvershootAlwaysOff)
+        properties.setScrollMetric(QScrollerProperties.HorizontalOvershootPolicy, QScrollerProperties.OvershootAlwaysOff)
+        scroller.setScrollerProperties(properties)
+
+    def set_entries(self, entries):
+        """Show the discovered plugins (PluginEntry tuples), in order."""
+        self.model.set_entries(entries)
+
+    def set_filter(self, text):
+        """Show only plugins whose title contains text (case-insensitive)."""
+        self.proxy.setFilterFixedString(text.strip())
+
+    def names(self):
+        """Return the subfolder names of the rows currently shown."""
+        return [self.proxy.index(row, 0).data(NameRole) for row in range(self.proxy.rowCount())]
+
+    def _on_clicked(self, index):
+        name = index.data(NameRole)
+        self.listView.clearSelection()
+        if name:
+            self.pageRequested.emit(name)
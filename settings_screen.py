@@ -1,23 +1,71 @@
 import os
-import importlib.util
-from PyQt5 import uic
-from PyQt5.QtWidgets import QWidget, QPushButton, QStackedWidget, QVBoxLayout, QScrollArea
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QPushButton, QStackedWidget, QVBoxLayout, QScrollArea, QLabel, QApplication
 from utils.helpers import check_ui_elements
-from utils.logger import setup_logger,error
+from utils.logger import error
+from async_logging import setup_logger
 from utils.dialog import WarningYesNo, WarningOk
+from ui_cache import load_ui
+from navigation_router import get_router
+from gcode_dispatcher import get_dispatcher
+from config_restore import ConfigRestoreEngine
+from restart_planner import RestartPlanner
+from theme_engine import get_theme
+from background_jobs import Job, JobStep, JobProgressOverlay, StepFailed, shell_step
+from startup_profiler import get_profiler
+from page_cache import PageCache, current_rss
+from page_scheduler import PageScheduler
+from settings_menu import SettingsMenu
+from plugin_registry import PluginRegistry, SETTINGS_FOLDER, load_backend_module, class_name_for
 
 class SettingsScreen(QWidget):
-    def __init__(self, main_window):
+    # Build plugin pages on first visit instead of at startup
+    LAZY_LOAD_PAGES = True
+
+    # Budget for built plugin pages; least-recently-viewed pages beyond it are torn down
+    PAGE_CACHE_MAX_PAGES = 8
+    PAGE_CACHE_MAX_BYTES = None
+
+    # Time per idle-loop slice when pages are built ahead of time (not lazily)
+    PAGE_BUILD_BUDGET_MS = 16
+
+    def __init__(self, main_window, lazy=None, settings_folder=SETTINGS_FOLDER,
+                 max_pages=PAGE_CACHE_MAX_PAGES, max_bytes=PAGE_CACHE_MAX_BYTES,
+                 build_budget_ms=PAGE_BUILD_BUDGET_MS):
         super(SettingsScreen, self).__init__()
         self.main_window = main_window
+        self.lazy = self.LAZY_LOAD_PAGES if lazy is None else lazy
+
+        # Cached discovery of the plugin subfolders
+        self.plugin_registry = PluginRegistry(settings_folder)
+
+        # Background job currently running (restore/reset/reboot)
+        self.current_job = None
+
+        # Pages not built yet (lazy mode or evicted), keyed by subfolder name
+        self.pending_pages = {}
+
+        # Per subfolder: plugin files, built widget, estimated memory and state saved across eviction
+        self.plugin_files = {}
+        self.page_widgets = {}
+        self.page_sizes = {}
+        self.saved_page_states = {}
+        self.page_cache = PageCache(self.evict_page, max_pages=max_pages, max_bytes=max_bytes)
+
+        # Builds pages in the background when not lazy; placeholders shown for queued pages opened early
+        self.page_scheduler = PageScheduler(self.build_scheduled_page, budget_ms=build_budget_ms, parent=self)
+        self.placeholder_pages = {}
+
+        # Shared name -> page registry and back-stack history
+        self.router = get_router(main_window)
 
         # Setup logger
         self.logger = setup_logger('settings_screen')
 
         # Load the UI with proper error handling
         try:
-            uic.loadUi('/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui/settings_screen/settings_screen.ui', self)
+            with get_profiler().stage('loadUi', page='settings_screen'):
+                load_ui(os.path.join(settings_folder, 'settings_screen.ui'), self)
             self.logger.info("Settings screen UI loaded successfully")
         except Exception as e:
             self.logger.error(f"Failed to load settings screen UI file: {e}")
@@ -50,17 +98,18 @@ class SettingsScreen(QWidget):
             self.verticalLayout = None
 
         # Validate UI components using simplified check_ui_elements function
-        check_ui_elements(self, [
-            self.stackedWidget,
-            self.mainSettingsPage,
-            self.scrollArea,
-            self.backButton,
-            self.restorePrintSettingsButton,
-            self.restoreFactoryDefaultsButton,
-            self.restartButton,
-            self.scrollAreaWidgetContents,
-            self.verticalLayout
-        ], "Settings Screen")
+        with get_profiler().stage('check_ui_elements', page='settings_screen'):
+            check_ui_elements(self, [
+                self.stackedWidget,
+                self.mainSettingsPage,
+                self.scrollArea,
+                self.backButton,
+                self.restorePrintSettingsButton,
+                self.restoreFactoryDefaultsButton,
+                self.restartButton,
+                self.scrollAreaWidgetContents,
+                self.verticalLayout
+            ], "Settings Screen")
 
         # Connect buttons to their respective functions directly
         if self.backButton:
@@ -91,9 +140,18 @@ class SettingsScreen(QWidget):
                 self.verticalLayout.addWidget(self.restartButton)
                 self.logger.debug("Added restart button to the bottom of the vertical layout")
 
+            # Plugin menu below the back button; the list scrolls itself and only paints visible rows
+            # Timed as the screen's stylesheet stage: building the menu applies the theme to its list and search box
+            with get_profiler().stage('stylesheet', page='settings_screen'):
+                self.settings_menu = SettingsMenu(self.scrollAreaWidgetContents)
+            self.settings_menu.pageRequested.connect(self.load_widget)
+            self.verticalLayout.insertWidget(1, self.settings_menu, 1)
+            self.scrollArea.setWidgetResizable(True)
+
         # Set the default page in stacked widget
         if self.stackedWidget and self.mainSettingsPage:
             self.stackedWidget.setCurrentWidget(self.mainSettingsPage)
+            self.router.register(self.page_key("mainSettingsPage"), self.stackedWidget, self.mainSettingsPage)
             self.logger.debug("Set default page to mainSettingsPage")
         else:
             self.logger.warning("Could not set default page - required widgets missing")
@@ -107,59 +165,163 @@ class SettingsScreen(QWidget):
             self.logger.error("Cannot load settings widgets: stackedWidget or verticalLayout is missing")
             return
             
-        settings_folder = '/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui/settings_screen'
         try:
-            for subfolder in os.listdir(settings_folder):
-                subfolder_path = os.path.join(settings_folder, subfolder)
-                if os.path.isdir(subfolder_path):
-                    ui_file = os.path.join(subfolder_path, f'{subfolder}.ui')
-                    py_file = os.path.join(subfolder_path, f'{subfolder}.py')
-                    if os.path.exists(ui_file) and os.path.exists(py_file):
-                        self.logger.info(f"Loading widget: {subfolder}")
-                        try:
-                            # Create a button for the subfolder
-                            button = self.create_settings_button(
-                                subfolder.replace('_', ' ').title(),
-                                lambda _, sf=subfolder: self.load_widget(sf)
-                            )
-                            self.verticalLayout.addWidget(button)
-
-                            # Load the widget and add it to the stacked widget
-                            widget_instance = self.create_widget_instance(ui_file, py_file)
-                            page = QWidget()
-                            layout = QVBoxLayout(page)
-                            layout.setContentsMargins(0, 0, 0, 0)
-                            layout.setSpacing(0)
-                            layout.addWidget(widget_instance)
-                            self.stackedWidget.addWidget(page)
-                            self.logger.info(f"Added widget: {widget_instance.objectName()}")
-                        except Exception as e:
-                            self.logger.error(f"Error loading widget {subfolder}: {e}")
+            entries = self.plugin_registry.discover()
+            for entry in entries:
+                subfolder = entry.name
+                self.plugin_files[subfolder] = (entry.ui_file, entry.py_file)
+                self.logger.info(f"Loading widget: {subfolder}")
+                # Defer .ui parsing and backend import until the page is opened,
+                # or, when not lazy, until an idle turn of the event loop
+                self.pending_pages[subfolder] = (entry.ui_file, entry.py_file)
+                if not self.lazy:
+                    self.page_scheduler.add(subfolder)
+                self.logger.debug("Deferred widget: %s", subfolder)
+            self.settings_menu.set_entries(entries)
         except Exception as e:
             self.logger.error(f"Error loading settings widgets: {e}")
 
-    def create_settings_button(self, text, handler):
-        """Create a styled settings button with the given text and handler"""
-        button = QPushButton(text)
-        button.setMinimumHeight(100)
-        button.setFont(QFont("Gotham Light", 16))
-        button.setStyleSheet("""
-            QPushButton {
-                border: 1px solid rgb(87, 87, 87);
-                background-color: qlineargradient(spread:pad, x1:0, y1:1, x2:0, y2:0.188, stop:0 rgba(180, 180, 180, 255), stop:1 rgba(255, 255, 255, 255));
-            }
-            QPushButton:pressed {
-                background-color: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1, stop: 0 #dadbde, stop: 1 #f6f7fa);
-            }
-            QPushButton:flat {
-                border: none; /* no border for a flat push button */
-            }
-            QPushButton:default {
-                border-color: navy; /* make the default button prominent */
-            }
-        """)
-        button.clicked.connect(handler)
-        return button
+    def build_page(self, name, ui_file, py_file, page=None):
+        """
+        Build the widget for a settings subfolder and add it to the stacked widget.
+
+        Args:
+            name (str): The subfolder name the page is registered under.
+            ui_file (str): The path to the .ui file.
+            py_file (str): The path to the .py file.
+            page (QWidget, optional): An existing page (e.g. a placeholder) to fill.
+
+        Returns:
+            QWidget: The page containing the widget instance.
+        """
+        rss_before = current_rss()
+        widget_instance = self.create_widget_instance(ui_file, py_file)
+        self.restore_page_state(name, widget_instance)
+        if page is None:
+            page = QWidget()
+            layout = QVBoxLayout(page)
+            layout.setContentsMargins(0, 0, 0, 0)
+            layout.setSpacing(0)
+            self.stackedWidget.addWidget(page)
+        page.layout().addWidget(widget_instance)
+        self.router.register(self.page_key(name), self.stackedWidget, page)
+        self.page_widgets[name] = widget_instance
+        self.page_sizes[name] = max(0, current_rss() - rss_before)
+        self.logger.info(f"Added widget: {widget_instance.objectName()}")
+        return page
+
+    def restore_page_state(self, name, widget_instance):
+        """Hand state saved when the page was evicted back to its rebuilt backend."""
+        state = self.saved_page_states.pop(name, None)
+        backend = getattr(widget_instance, 'backend', None)
+        if state is not None and hasattr(backend, 'restore_state'):
+            try:
+                backend.restore_state(state)
+            except Exception as e:
+                self.logger.error(f"Error restoring state of {name}: {e}")
+
+    def evict_page(self, name):
+        """
+        Tear down a built page and its backend; it is rebuilt on the next visit.
+
+        Backends may define save_state() (its result is passed to
+        restore_state(state) after the rebuild) and teardown().
+
+        Args:
+            name (str): The subfolder name of the page.
+        """
+        key = self.page_key(name)
+        page = self.router.page(key)
+        if page is None or page is self.stackedWidget.currentWidget():
+            return
+
+        backend = getattr(self.page_widgets.pop(name, None), 'backend', None)
+        if backend is not None:
+            try:
+                if hasattr(backend, 'save_state'):
+                    self.saved_page_states[name] = backend.save_state()
+                if hasattr(backend, 'teardown'):
+                    backend.teardown()
+            except Exception as e:
+                self.logger.error(f"Error tearing down backend of {name}: {e}")
+
+        self.placeholder_pages.pop(name, None)
+        self.router.unregister(key)
+        self.stackedWidget.removeWidget(page)
+        page.deleteLater()
+        self.page_sizes.pop(name, None)
+        self.pending_pages[name] = self.plugin_files[name]
+        self.logger.info(f"Evicted widget: {name}")
+
+    def create_placeholder_page(self, name):
+        """Create a page showing a loading message while the real widget is built."""
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        label = QLabel(f"Loading {name.replace('_', ' ').title()}...")
+        label.setObjectName("loadingPlaceholderLabel")
+        label.setAlignment(Qt.AlignCenter)
+        get_theme().apply(label, 'placeholder')
+        layout.addWidget(label)
+        self.stackedWidget.addWidget(page)
+        return page, label
+
+    def load_pending_page(self, name):
+        """
+        Build a deferred page, showing a placeholder until it is ready.
+
+        Args:
+            name (str): The subfolder name of the page to build.
+
+        Returns:
+            QWidget: The built page, or None if building failed.
+        """
+        # Taken off the pending list before events are processed, so a second tap
+        # while the placeholder paints navigates to it instead of building the page again
+        files = self.pending_pages.pop(name)
+        page, label = self.show_placeholder_page(name)
+        # Let the placeholder paint before the blocking load starts
+        QApplication.processEvents()
+        return self.fill_placeholder_page(name, files, page, label)
+
+    def show_placeholder_page(self, name):
+        """Register and show a placeholder page for a page that is not built yet."""
+        page, label = self.create_placeholder_page(name)
+        self.router.register(self.page_key(name), self.stackedWidget, page)
+        self.router.navigate(self.page_key(name))
+        return page, label
+
+    def fill_placeholder_page(self, name, files, page, label):
+        """Build a deferred page ((ui_file, py_file)) into its placeholder; returns the page, or None if building failed."""
+        ui_file, py_file = files
+        try:
+            self.build_page(name, ui_file, py_file, page=page)
+        except Exception as e:
+            self.logger.error(f"Error loading widget {name}: {e}")
+            label.setText(f"Failed to load {name.replace('_', ' ').title()}")
+            # The placeholder stays registered, so later visits show the failure message
+            return None
+        label.hide()
+        label.deleteLater()
+        return page
+
+    def build_scheduled_page(self, name):
+        """Build a page queued on the page scheduler, into its placeholder if it was opened early."""
+        if name not in self.pending_pages:
+            return
+        files = self.pending_pages.pop(name)
+        placeholder = self.placeholder_pages.pop(name, None)
+        if placeholder is not None:
+            self.fill_placeholder_page(name, files, *placeholder)
+            return
+        ui_file, py_file = files
+        try:
+            self.build_page(name, ui_file, py_file)
+        except Exception as e:
+            self.logger.error(f"Error loading widget {name}: {e}")
+            # Retry on the first visit
+            self.pending_pages[name] = (ui_file, py_file)
 
     def load_widget(self, widget_name):
         """
@@ -173,12 +335,33 @@ class SettingsScreen(QWidget):
             self.logger.error("Cannot switch widgets - stacked widget is missing")
             return
             
-        for i in range(self.stackedWidget.count()):
-            widget = self.stackedWidget.widget(i)
-            if widget.findChild(QWidget, widget_name):
-                self.stackedWidget.setCurrentWidget(widget)
+        if widget_name in self.page_scheduler:
+            # Queued but not built yet: show a placeholder and build it in the next slice
+            if widget_name not in self.placeholder_pages:
+                self.placeholder_pages[widget_name] = self.show_placeholder_page(widget_name)
+            else:
+                self.router.navigate(self.page_key(widget_name))
+            self.page_scheduler.promote(widget_name)
+            self.logger.info(f"Switched to widget: {widget_name} (building)")
+        elif widget_name in self.pending_pages:
+            if self.load_pending_page(widget_name):
                 self.logger.info(f"Switched to widget: {widget_name}")
-                break
+        elif self.router.navigate(self.page_key(widget_name)):
+            self.logger.info(f"Switched to widget: {widget_name}")
+        else:
+            return
+
+        # Mark as most recently viewed; may tear down the least recently viewed pages
+        self.page_cache.touch(widget_name, self.page_sizes.get(widget_name))
+
+    def go_back_page(self):
+        """Return to the previously shown settings page, or the main settings page."""
+        self.router.back(self.stackedWidget, default=self.page_key("mainSettingsPage"))
+
+    @staticmethod
+    def page_key(name):
+        """Return the router name for a settings page."""
+        return f"settings/{name}"
 
     def create_widget_instance(self, ui_file, py_file):
         """
@@ -194,19 +377,23 @@ class SettingsScreen(QWidget):
         class DynamicWidget(QWidget):
             def __init__(self, parent):
                 super(DynamicWidget, self).__init__(parent)
-                uic.loadUi(ui_file, self)
-                self.setObjectName(os.path.basename(ui_file).split('.')[0])
+                page = os.path.basename(ui_file).split('.')[0]
+                with get_profiler().stage('loadUi', page=page):
+                    load_ui(ui_file, self)
+                self.setObjectName(page)
                 self.load_backend(py_file, parent)
 
             def load_backend(self, py_file, parent):
-                spec = importlib.util.spec_from_file_location("module.name", py_file)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
+                page = os.path.basename(py_file).split('.')[0]
+                profiler = get_profiler()
+                with profiler.stage('exec_module', page=page):
+                    module = load_backend_module(py_file)
                 # Assuming the class name in the .py file is the same as the subfolder name
-                class_name = os.path.basename(py_file).split('.')[0].title().replace('_', '')
+                class_name = class_name_for(page)
                 try:
                     backend_class = getattr(module, class_name)
-                    backend_instance = backend_class(self, parent)
+                    with profiler.stage('backend constructor', page=page):
+                        backend_instance = backend_class(self, parent)
                     self.backend = backend_instance
                 except AttributeError as e:
                     parent.logger.error(f"Error creating widget instance: {e}")
@@ -219,31 +406,78 @@ class SettingsScreen(QWidget):
         self.logger.info("Back button clicked, returning to menu screen")
         self.main_window.switch_screen(self.main_window.menu_screen)
 
+    def run_job(self, title, steps, error_context, on_success=None, on_failure=None):
+        """
+        Run a multi-step operation in the background behind a progress overlay.
+
+        Args:
+            title (str): Title shown on the overlay.
+            steps (list): JobStep instances, run in order.
+            error_context (str): Prefix for the error message if a step fails.
+            on_success (callable, optional): Called once every step succeeded.
+            on_failure (callable, optional): Called with the failed StepResults instead of
+                showing an error dialog.
+
+        Returns:
+            Job: The started job.
+        """
+        job = Job(title, steps)
+        overlay = JobProgressOverlay(self, title)
+        overlay.attach(job)
+        job.finished.connect(lambda results: self._on_job_finished(job, error_context, on_success, on_failure))
+        self.current_job = job
+        job.start()
+        return job
+
+    def _on_job_finished(self, job, error_context, on_success, on_failure=None):
+        """Report the outcome of a background job."""
+        self.current_job = None
+        failed = job.failed_steps()
+        if failed:
+            message = "{}: {}".format(error_context, "; ".join(
+                f"{result.name} failed ({result.error})" for result in failed))
+            error(message)
+            if on_failure:
+                on_failure(failed)
+            else:
+                WarningOk(self, message, overlay=True)
+        elif any(result.status == 'cancelled' for result in job.results):
+            self.logger.info(f"Job cancelled: {job.name}")
+        elif on_success:
+            on_success()
+
     def restore_print_settings(self):
         """Restore the print settings to their default values."""
         self.logger.info("Restoring print settings to default values.")
         try:
             if WarningYesNo(self, "Are you sure you want to restore default print settings?\nWarning: Doing so will erase offsets and bed leveling info",
                                    overlay=True):
-                os.system('sudo cp -f firmware/COMMON_FILAMENT_SENSOR.cfg /home/pi/COMMON_FILAMENT_SENSOR.cfg')
-                os.system('sudo cp -f firmware/COMMON_GCODE_MACROS.cfg /home/pi/COMMON_GCODE_MACROS.cfg')
-                os.system('sudo cp -f firmware/COMMON_IDEX.cfg /home/pi/COMMON_IDEX.cfg')
-                os.system('sudo cp -f firmware/COMMON_MOTHERBOARD.cfg /home/pi/COMMON_MOTHERBOARD.cfg')
-                os.system('sudo cp -f firmware/PRINTERS_TWINDRAGON_600x300.cfg /home/pi/PRINTERS_TWINDRAGON_600x300.cfg')
-                os.system('sudo cp -f firmware/PRINTERS_TWINDRAGON_600x600.cfg /home/pi/PRINTERS_TWINDRAGON_600x600.cfg')
-                os.system('sudo cp -f firmware/TOOLHEADS_TD-01_TOOLHEAD0.cfg /home/pi/TOOLHEADS_TD-01_TOOLHEAD0.cfg')
-                os.system('sudo cp -f firmware/TOOLHEADS_TD-01_TOOLHEAD1.cfg /home/pi/TOOLHEADS_TD-01_TOOLHEAD1.cfg')
-                os.system('sudo cp -f firmware/variables.cfg /home/pi/variables.cfg')
                 #TODO: check printer variant setting and modify printer.cfg accordingly
-                self.main_window.octoprintclient.gcode(command='M502')
-                self.main_window.octoprintclient.gcode(command='M500')
-                self.main_window.octoprintclient.gcode(command='FIRMWARE_RESTART')
-                self.main_window.octoprintclient.gcode(command='RESTART')
+                self.run_job("Restoring print settings", [
+                    JobStep("Restoring firmware configuration", self._restore_firmware_files),
+                    JobStep("Activating configuration", self._reset_firmware),
+                ], "Error in MainUiClass.restorePrintDefaults")
         except Exception as e:
             error("Error in MainUiClass.restorePrintDefaults: {}".format(e))
             WarningOk(self, "Error in MainUiClass.restorePrintDefaults: {}".format(e), overlay=True)
 
+    def _restore_firmware_files(self):
+        """Restore what differs from the factory firmware configuration (job step)."""
+        report = ConfigRestoreEngine().restore()
+        for result in report.results:
+            self.logger.info(f"Restore {os.path.basename(result.target)}: {result.status}")
+        failed = [result for result in report.results if result.status == 'failed']
+        if failed:
+            raise StepFailed("Could not restore " + ", ".join(
+                f"{os.path.basename(result.target)} ({result.error})" for result in failed))
+        # SAVE_VARIABLE commands and the cheapest restart that activates the copied files
+        self.firmware_activation_commands = report.commands
 
+    def _reset_firmware(self):
+        """Reset EEPROM settings and activate the restored configuration, waiting for OctoPrint to accept (job step)."""
+        commands = getattr(self, 'firmware_activation_commands', [])
+        self.logger.info(f"Activating restored configuration: {', '.join(commands) or 'nothing to restart'}")
+        get_dispatcher(self.main_window).send_batch(['M502', 'M500'] + commands).result(timeout=60)
 
     def restore_factory_defaults(self):
         """Restore the system to factory default settings."""
@@ -251,34 +485,60 @@ class SettingsScreen(QWidget):
         try:
             if WarningYesNo(self, "Are you sure you want to restore machine state to factory defaults?\nWarning: Doing so will also reset printer profiles, WiFi & Ethernet config.",
                                    overlay=True):
-                os.system('sudo cp -f config/dhcpcd.conf /etc/dhcpcd.conf')
-                os.system('sudo cp -f config/wpa_supplicant.conf /etc/wpa_supplicant/wpa_supplicant.conf')
-                os.system('sudo rm -rf /home/pi/.octoprint/users.yaml')
-                os.system('sudo cp -f config/users.yaml /home/pi/.octoprint/users.yaml')
-                os.system('sudo rm -rf /home/pi/.octoprint/printerProfiles/*')
-                os.system('sudo rm -rf /home/pi/.octoprint/scripts/gcode')
-                os.system('sudo rm -rf /home/pi/.octoprint/print_restore.json')
-                os.system('sudo cp -f config/config.yaml /home/pi/.octoprint/config.yaml')
-                self.tellAndReboot("Settings restored. Rebooting...")
+                # Files the steps below write or remove; the restart planner maps them to services
+                changed_paths = ['/etc/dhcpcd.conf', '/etc/wpa_supplicant/wpa_supplicant.conf',
+                                 '/home/pi/.octoprint/users.yaml', '/home/pi/.octoprint/printerProfiles/',
+                                 '/home/pi/.octoprint/scripts/gcode', '/home/pi/.octoprint/print_restore.json',
+                                 '/home/pi/.octoprint/config.yaml']
+                self.run_job("Restoring factory defaults", [
+                    shell_step("Restoring network configuration", ['sudo', 'cp', '-f', 'config/dhcpcd.conf', '/etc/dhcpcd.conf']),
+                    shell_step("Restoring WiFi configuration", ['sudo', 'cp', '-f', 'config/wpa_supplicant.conf', '/etc/wpa_supplicant/wpa_supplicant.conf']),
+                    shell_step("Removing users", ['sudo', 'rm', '-rf', '/home/pi/.octoprint/users.yaml']),
+                    shell_step("Restoring users", ['sudo', 'cp', '-f', 'config/users.yaml', '/home/pi/.octoprint/users.yaml']),
+                    shell_step("Removing printer profiles", ['sudo', 'sh', '-c', 'rm -rf /home/pi/.octoprint/printerProfiles/*']),
+                    shell_step("Removing G-code scripts", ['sudo', 'rm', '-rf', '/home/pi/.octoprint/scripts/gcode']),
+                    shell_step("Removing print restore state", ['sudo', 'rm', '-rf', '/home/pi/.octoprint/print_restore.json']),
+                    shell_step("Restoring OctoPrint configuration", ['sudo', 'cp', '-f', 'config/config.yaml', '/home/pi/.octoprint/config.yaml']),
+                ], "Error in MainUiClass.restoreFactoryDefaults",
+                    on_success=lambda: self.apply_restart_plan(RestartPlanner().plan(changed_paths)))
         except Exception as e:
             error("Error in MainUiClass.restoreFactoryDefaults: {}".format(e))
             WarningOk(self, "Error in MainUiClass.restoreFactoryDefaults: {}".format(e), overlay=True)
 
-    
-    
     def restart_system(self):
         """Restart the system."""
         self.logger.info("Restarting the system.")
-        # Add logic to restart the system
         try:
-            if WarningYesNO(self, "Are you sure you want to restart the system?", overlay=True):
+            if WarningYesNo(self, "Are you sure you want to restart the system?", overlay=True):
                 self.logger.info("User confirmed reboot")
-                os.system("sudo reboot")
-
+                # An explicit full reboot, e.g. for a stuck machine; file changes use apply_restart_plan
+                self.run_job("Restarting", [RestartPlanner().reboot_step()], "Error during restart")
             else:
                 self.logger.info("User cancelled reboot")
         except Exception as e:
             self.logger.error(f"Error during restart: {e}")
-            WarningOK(self,f"Error during restart: {e}", overlay= True)
+            WarningOk(self, f"Error during restart: {e}", overlay=True)
+
+    def apply_restart_plan(self, plan):
+        """
+        Restart the services of a plan in the background, rebooting if the plan needs it
+        or a service fails its health check.
 
+        Args:
+            plan (RestartPlan): From RestartPlanner.plan().
+        """
+        planner = RestartPlanner()
+        if plan.reboot or not plan.services:
+            if plan.reboot:
+                self.logger.info(f"Rebooting: {'; '.join(plan.reasons)}")
+                self.run_job("Restarting", [planner.reboot_step()], "Error during restart")
+            return
+        self.logger.info(f"Restarting services: {', '.join(plan.services)}")
+        self.run_job("Restarting services", planner.steps(plan), "Error restarting services",
+                     on_success=lambda: self.logger.info("Services restarted and healthy"),
+                     on_failure=lambda failed: self._reboot_after_failed_restart(planner, failed))
 
+    def _reboot_after_failed_restart(self, planner, failed):
+        """Fall back to a full reboot when a service did not come back."""
+        self.logger.error(f"Service restart failed ({'; '.join(result.name for result in failed)}), rebooting")
+        self.run_job("Restarting", [planner.reboot_step()], "Error during restart")
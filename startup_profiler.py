@@ -0,0 +1,168 @@
+"""
+Opt-in timing of startup stages, page loads and printer round trips.
+
+Profiling is off unless the CONTROLCENTER_PROFILE environment variable is set
+or the process is started with --profile (or enable() is called). The
+variable may name the trace file; otherwise it is written to
+/tmp/controlcenter_trace.json. The trace uses the Chrome trace event format
+(open it in chrome://tracing or Perfetto), and a ranked summary of the
+slowest pages is logged when the process exits.
+
+    with get_profiler().stage('loadUi', page='wifi_settings'):
+        load_ui(ui_file, self)
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from async_logging import setup_logger
+
+ENV_VAR = 'CONTROLCENTER_PROFILE'
+DEFAULT_TRACE_PATH = '/tmp/controlcenter_trace.json'
+
+logger = setup_logger('startup_profiler')
+
+
+class _NullStage(object):
+    """Context manager used while profiling is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler(object):
+    """Records named, timed stages attributed to a page."""
+    def __init__(self, enabled=False, trace_path=DEFAULT_TRACE_PATH):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.events = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def stage(self, name, page=None, category='startup'):
+        """
+        Time a block of code.
+
+        Args:
+            name (str): The stage, e.g. "loadUi" or "exec_module".
+            page (str, optional): The page (or G-code command) the time belongs to.
+            category (str): "startup" for page construction, "gcode" for printer round trips.
+
+        Returns:
+            A context manager; a shared no-op one while profiling is off.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timed(name, page, category)
+
+    @contextmanager
+    def _timed(self, name, page, category):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, page, category, start, time.perf_counter() - start)
+
+    def record(self, name, page, category, start, duration):
+        """Add a finished stage (start is a time.perf_counter() value)."""
+        with self._lock:
+            self.events.append({
+                'name': name,
+                'page': page,
+                'category': category,
+                'start': start - self._origin,
+                'duration': duration,
+                'thread': threading.get_ident(),
+            })
+
+    def chrome_trace(self):
+        """Return the recorded stages in Chrome trace event format."""
+        pid = os.getpid()
+        return {'traceEvents': [{
+            'name': event['name'] if event['page'] is None else f"{event['name']} [{event['page']}]",
+            'cat': event['category'],
+            'ph': 'X',
+            'ts': event['start'] * 1e6,
+            'dur': event['duration'] * 1e6,
+            'pid': pid,
+            'tid': event['thread'],
+            'args': {'page': event['page']},
+        } for event in self.events]}
+
+    def dump(self, path=None):
+        """Write the Chrome trace to a file and return its path."""
+        path = path or self.trace_path
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        logger.info(f"Profile trace written to {path}")
+        return path
+
+    def page_totals(self, category='startup'):
+        """
+        Return pages ranked by total time in a category.
+
+        Returns:
+            list: (page, total seconds, {stage: seconds}) tuples, slowest first.
+        """
+        totals = {}
+        for event in self.events:
+            if event['category'] != category:
+                continue
+            stages = totals.setdefault(event['page'], {})
+            stages[event['name']] = stages.get(event['name'], 0.0) + event['duration']
+        ranked = [(page, sum(stages.values()), stages) for page, stages in totals.items()]
+        return sorted(ranked, key=lambda item: item[1], reverse=True)
+
+    def log_summary(self, top=10):
+        """Log the slowest pages with their stage breakdown, and the slowest G-code round trips."""
+        for rank, (page, total, stages) in enumerate(self.page_totals()[:top], 1):
+            breakdown = ", ".join(f"{name} {seconds * 1000:.1f} ms"
+                                  for name, seconds in sorted(stages.items(), key=lambda item: -item[1]))
+            logger.info(f"#{rank} {page}: {total * 1000:.1f} ms ({breakdown})")
+        gcode = sorted((event for event in self.events if event['category'] == 'gcode'),
+                       key=lambda event: event['duration'], reverse=True)
+        for event in gcode[:top]:
+            logger.info(f"G-code {event['page']}: {event['duration'] * 1000:.1f} ms")
+
+    def finish(self):
+        """Dump the trace and log the summary (registered to run at exit)."""
+        if not self.events:
+            return
+        try:
+            self.dump()
+        except OSError as e:
+            logger.error(f"Could not write profile trace: {e}")
+        self.log_summary()
+
+
+_profiler = None
+
+
+def get_profiler():
+    """Return the process-wide profiler, enabled from the environment or command line."""
+    global _profiler
+    if _profiler is None:
+        setting = os.environ.get(ENV_VAR, '')
+        _profiler = Profiler()
+        if (setting and setting != '0') or '--profile' in sys.argv:
+            enable(setting if setting not in ('', '1') else None)
+    return _profiler
+
+
+def enable(trace_path=None):
+    """Turn profiling on, optionally writing the trace to trace_path."""
+    profiler = get_profiler()
+    if trace_path:
+        profiler.trace_path = trace_path
+    if not profiler.enabled:
+        profiler.enabled = True
+        atexit.register(profiler.finish)
+    return profiler
@@ -0,0 +1,42 @@
+import os
+import sys
+import types
+import logging
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _install_utils_stub():
+    """
+    Provide the parts of the application's utils package the modules import.
+
+    utils (logger, helpers, dialog) ships with the ControlCenter application,
+    not with this repository; the tests only need its logger to exist.
+    """
+    utils = types.ModuleType('utils')
+    utils.__path__ = []
+
+    logger = types.ModuleType('utils.logger')
+    logger.setup_logger = logging.getLogger
+    logger.error = logging.getLogger('utils').error
+    logger.info = logging.getLogger('utils').info
+
+    helpers = types.ModuleType('utils.helpers')
+    helpers.check_ui_elements = lambda obj, elements, name: None
+
+    dialog = types.ModuleType('utils.dialog')
+    dialog.WarningOk = lambda parent, message, overlay=False: True
+    dialog.WarningYesNo = lambda parent, message, overlay=False: True
+
+    for name, module in (('utils', utils), ('utils.logger', logger), ('utils.helpers', helpers),
+                         ('utils.dialog', dialog)):
+        sys.modules[name] = module
+        if name != 'utils':
+            setattr(utils, name.split('.')[1], module)
+
+
+try:
+    import utils.logger  # noqa: F401
+except ImportError:
+    _install_utils_stub()
@@ -0,0 +1,113 @@
+import os
+import struct
+from calibration_journal import (CalibrationJournal, JournalEntry, HEADER, RECORD, LOG_START, MAGIC,
+                                 SLOT_COUNT, slot_index)
+
+
+def open_journal(tmp_path, **kwargs):
+    return CalibrationJournal(str(tmp_path / 'calibration.journal'), **kwargs)
+
+
+def test_new_file_has_header_and_empty_slot_table(tmp_path):
+    journal = open_journal(tmp_path)
+    assert journal.available
+    assert len(journal) == 0
+    with open(journal.path, 'rb') as f:
+        data = f.read()
+    assert len(data) == LOG_START
+    assert HEADER.unpack(data[:HEADER.size]) == (MAGIC, RECORD.size, SLOT_COUNT)
+    assert journal.last_known('M218', 1) == {}
+
+
+def test_slot_indexes_are_distinct():
+    keys = [('M218', tool, axis) for tool in range(8) for axis in 'XYZ'] + [('M851', 0, axis) for axis in 'XYZ']
+    indexes = [slot_index(*key) for key in keys]
+    assert sorted(indexes) == list(range(SLOT_COUNT))
+    assert slot_index('M218', 8, 'X') is None
+    assert slot_index('M851', 0, 'E') is None
+    assert slot_index('G92', 0, 'X') is None
+
+
+def test_records_round_trip_through_log_and_slots(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.record_offsets('M218', 1, {'X': 0.1, 'Y': -0.2})
+    journal.record('M218', 1, 'X', 0.15, timestamp=1000.0)
+    journal.record('M851', 0, 'Z', -1.5, timestamp=1001.0)
+    journal.close()
+
+    journal = open_journal(tmp_path)
+    assert len(journal) == 4
+    assert journal.last_known('M218', 1) == {'X': 0.15, 'Y': -0.2}
+    assert journal.last_known('M851') == {'Z': -1.5}
+    assert journal.last_known('M218', 0) == {}
+    assert journal.history('M218', 1, 'X')[-1] == JournalEntry(1000.0, 'M218', 1, 'X', 0.15)
+    assert [entry.value for entry in journal.history(axis='X')] == [0.1, 0.15]
+    assert journal.history('M851', since=1001.0) == [JournalEntry(1001.0, 'M851', 0, 'Z', -1.5)]
+    assert journal.drift('M218', 1, 'X') == (0.1, 0.15, 0.15 - 0.1)
+    assert journal.drift('M218', 2, 'X') is None
+
+
+def test_keys_without_a_slot_are_ignored(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.record('M218', 9, 'X', 1.0)
+    journal.record('G92', 0, 'Z', 1.0)
+    assert len(journal) == 0
+
+
+def test_torn_record_is_truncated_on_open(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.record('M218', 1, 'X', 0.1, timestamp=1.0)
+    journal.record('M218', 1, 'X', 0.2, timestamp=2.0)
+    journal.close()
+    # A power loss in the middle of the third record
+    with open(journal.path, 'ab') as f:
+        f.write(RECORD.pack(3.0, b'M218', 1, b'X', 0.3)[:RECORD.size // 2])
+
+    journal = open_journal(tmp_path)
+    assert os.path.getsize(journal.path) == LOG_START + 2 * RECORD.size
+    assert [entry.value for entry in journal.history()] == [0.1, 0.2]
+    journal.record('M218', 1, 'X', 0.4, timestamp=4.0)
+    assert [entry.value for entry in journal.history()] == [0.1, 0.2, 0.4]
+
+
+def test_foreign_file_is_not_used(tmp_path):
+    path = tmp_path / 'calibration.journal'
+    path.write_bytes(struct.pack('<4sHH', b'XXXX', 1, 1) + bytes(LOG_START))
+    journal = CalibrationJournal(str(path))
+    assert not journal.available
+    journal.record('M218', 1, 'X', 0.1)
+    assert journal.last_known('M218', 1) == {}
+
+
+def test_compact_keeps_slot_table(tmp_path):
+    journal = open_journal(tmp_path, compact_threshold=None)
+    for timestamp, value in enumerate([0.1, 0.1, 0.2, 0.2, 0.2, 0.3], start=1):
+        journal.record('M218', 1, 'X', value, timestamp=float(timestamp))
+    journal.record('M851', 0, 'Z', -1.5, timestamp=10.0)
+
+    assert journal.compact() == 3
+    assert [entry.value for entry in journal.history('M218')] == [0.1, 0.2, 0.3]
+    assert journal.last_known('M218', 1) == {'X': 0.3}
+    assert journal.last_known('M851') == {'Z': -1.5}
+
+    # Limits may drop every logged record of a key; its slot still holds the last value
+    assert journal.compact(max_records=1) == 3
+    assert journal.history() == [JournalEntry(10.0, 'M851', 0, 'Z', -1.5)]
+    assert journal.compact(max_age=60) == 1
+    assert len(journal) == 0
+    journal.close()
+
+    journal = open_journal(tmp_path)
+    assert journal.last_known('M218', 1) == {'X': 0.3}
+    assert journal.last_known('M851') == {'Z': -1.5}
+
+
+def test_compacts_on_open_past_threshold(tmp_path):
+    journal = open_journal(tmp_path, compact_threshold=None)
+    for timestamp in range(5):
+        journal.record('M218', 1, 'Y', 0.5, timestamp=float(timestamp))
+    journal.close()
+
+    journal = open_journal(tmp_path, compact_threshold=3)
+    assert len(journal) == 1
+    assert journal.last_known('M218', 1) == {'Y': 0.5}
@@ -0,0 +1,145 @@
+from klipper_config import (parse_config, diff_configs, activation_for, strongest_activation,
+                            save_variable_command, ConfigChange)
+from config_restore import ConfigRestoreEngine
+
+
+def restore(tmp_path, live, factory, name='printer.cfg'):
+    source_dir, target_dir = tmp_path / 'factory', tmp_path / 'live'
+    source_dir.mkdir()
+    target_dir.mkdir()
+    (source_dir / name).write_text(factory)
+    (target_dir / name).write_text(live)
+    engine = ConfigRestoreEngine(files=[name], source_dir=str(source_dir), target_dir=str(target_dir),
+                                 use_sudo=False)
+    return engine.restore(), (target_dir / name).read_text()
+
+
+def test_parse_sections_keys_and_comments():
+    config = parse_config(
+        "# header comment\n"
+        "[printer]\n"
+        "Kinematics: corexy   ; inline comment\n"
+        "max_velocity = 300 # another\n"
+        "\n"
+        "[extruder]\n"
+        "nozzle_diameter: 0.4\n")
+    assert list(config) == ['printer', 'extruder']
+    assert config['printer'] == {'kinematics': 'corexy', 'max_velocity': '300'}
+    assert config['extruder']['nozzle_diameter'] == '0.4'
+
+
+def test_parse_continuation_lines():
+    config = parse_config(
+        "[gcode_macro START]\n"
+        "gcode:\n"
+        "    G28\n"
+        "    G1 Z10   # lift\n"
+        "description: start\n")
+    assert config['gcode_macro START']['gcode'] == "G28\nG1 Z10"
+    assert config['gcode_macro START']['description'] == 'start'
+
+
+def test_autosave_block_overrides_sections():
+    config = parse_config(
+        "[probe]\n"
+        "z_offset: 1.0\n"
+        "pin: PA1\n"
+        "\n"
+        "#*# <---------------------- SAVE_CONFIG ---------------------->\n"
+        "#*# DO NOT EDIT THIS BLOCK OR BELOW. The contents are auto-generated.\n"
+        "#*#\n"
+        "#*# [probe]\n"
+        "#*# z_offset = 1.25\n"
+        "#*#\n"
+        "#*# [bed_mesh default]\n"
+        "#*# points =\n"
+        "#*# \t0.1, 0.2\n"
+        "#*# \t0.3, 0.4\n")
+    assert config['probe'] == {'z_offset': '1.25', 'pin': 'PA1'}
+    assert config['bed_mesh default']['points'] == "0.1, 0.2\n0.3, 0.4"
+
+
+def test_numbers_compare_by_value():
+    live = parse_config("[extruder]\nrotation_distance: 0.50\nmax_temp = 280\n")
+    factory = parse_config("[extruder]\nrotation_distance: 0.5\nmax_temp: 280.0\n")
+    assert diff_configs(live, factory) == []
+
+
+def test_formatting_only_changes_are_equivalent():
+    live = parse_config("[printer]\nkinematics:   corexy  # changed comment\n")
+    factory = parse_config("[printer]\nkinematics: corexy\n")
+    assert diff_configs(live, factory) == []
+
+
+def test_diff_reports_changed_added_and_removed_keys():
+    live = parse_config("[printer]\nmax_velocity: 200\nmax_accel: 3000\n")
+    factory = parse_config("[printer]\nmax_velocity: 300\nsquare_corner_velocity: 5\n")
+    assert diff_configs(live, factory) == [
+        ConfigChange('printer', 'max_velocity', '200', '300', 'host'),
+        ConfigChange('printer', 'square_corner_velocity', None, '5', 'host'),
+        ConfigChange('printer', 'max_accel', '3000', None, 'host'),
+    ]
+
+
+def test_activation_levels():
+    assert activation_for('Variables', 'tool_offset_x') == 'variable'
+    assert activation_for('printer', 'max_velocity') == 'host'
+    assert activation_for('gcode_macro PARK', 'gcode') == 'host'
+    assert activation_for('mcu', 'serial') == 'mcu'
+    assert activation_for('tmc2209 stepper_x', 'run_current') == 'mcu'
+    assert activation_for('stepper_x', 'step_pin') == 'mcu'
+    assert activation_for('extruder', 'heater_pin') == 'mcu'
+    assert activation_for('fan', 'pin') == 'mcu'
+    assert activation_for('stepper_x', 'rotation_distance') == 'host'
+
+
+def test_strongest_activation():
+    changes = [ConfigChange('printer', 'a', '1', '2', 'host'), ConfigChange('mcu', 'b', '1', '2', 'mcu')]
+    assert strongest_activation(changes) == 'mcu'
+    assert strongest_activation(changes[:1]) == 'host'
+    assert strongest_activation([]) is None
+
+
+def test_variables_values_compare_as_literals():
+    live = parse_config("[Variables]\noffset = 0.10\nname = 'abc'\n")
+    factory = parse_config("[Variables]\noffset = 0.1\nname = \"abc\"\n")
+    assert diff_configs(live, factory) == []
+
+
+def test_save_variable_command_quotes_values_with_spaces():
+    assert save_variable_command('tool_offset_x', '0.25') == "SAVE_VARIABLE VARIABLE=tool_offset_x VALUE=0.25"
+    assert save_variable_command('label', "'a b'") == "SAVE_VARIABLE VARIABLE=label VALUE=\"'a b'\""
+
+
+def test_variables_only_diff_becomes_save_variable(tmp_path):
+    report, live = restore(tmp_path, "[Variables]\noffset = 0.3\n", "[Variables]\noffset = 0.1\n",
+                           name='variables.cfg')
+    assert [result.status for result in report.results] == ['variables']
+    assert report.commands == ["SAVE_VARIABLE VARIABLE=offset VALUE=0.1"]
+    # Klipper writes variables.cfg itself; the file is not copied
+    assert live == "[Variables]\noffset = 0.3\n"
+
+
+def test_equivalent_file_is_left_alone(tmp_path):
+    report, live = restore(tmp_path, "[printer]\nmax_velocity: 300.0  # tuned\n", "[printer]\nmax_velocity: 300\n")
+    assert [result.status for result in report.results] == ['equivalent']
+    assert report.commands == []
+    assert live == "[printer]\nmax_velocity: 300.0  # tuned\n"
+
+
+def test_host_change_restarts_host(tmp_path):
+    report, live = restore(tmp_path, "[printer]\nmax_velocity: 200\n", "[printer]\nmax_velocity: 300\n")
+    assert [result.status for result in report.results] == ['copied']
+    assert report.commands == ['RESTART']
+    assert live == "[printer]\nmax_velocity: 300\n"
+
+
+def test_pin_change_needs_firmware_restart(tmp_path):
+    report, _ = restore(tmp_path, "[printer]\nmax_velocity: 300\n[stepper_x]\nstep_pin: PB1\n",
+                        "[printer]\nmax_velocity: 200\n[stepper_x]\nstep_pin: PB2\n")
+    assert report.commands == ['FIRMWARE_RESTART']
+
+
+def test_mcu_section_change_needs_firmware_restart(tmp_path):
+    report, _ = restore(tmp_path, "[mcu]\nserial: /dev/ttyAMA0\n", "[mcu]\nserial: /dev/serial0\n")
+    assert report.commands == ['FIRMWARE_RESTART']
@@ -0,0 +1,104 @@
+from PyQt5.QtGui import QFont, QPalette, QColor
+from PyQt5.QtWidgets import QApplication
+from async_logging import setup_logger
+
+# Widgets opt in to a style by setting their "role" property (see ThemeEngine.apply).
+APP_STYLESHEET = """
+QListView[role="settingsMenu"] {
+    border: none;
+    background: transparent;
+}
+QWidget[role="jobOverlay"] {
+    background-color: rgba(0, 0, 0, 160);
+}
+QWidget[role="jobOverlay"] QLabel {
+    color: white;
+}
+"""
+
+# role -> (family, point size)
+FONTS = {
+    'settingsMenu': ("Gotham Light", 16),
+    'settingsSearch': ("Gotham Light", 14),
+    'placeholder': ("Gotham Light", 16),
+    'overlayTitle': ("Gotham Light", 18),
+    'overlayText': ("Gotham Light", 14),
+}
+
+# role -> {color role: (r, g, b)}
+PALETTES = {
+    'offsetSpinBox': {QPalette.Highlight: (40, 40, 40)},
+}
+
+
+class ThemeEngine(object):
+    """
+    Application-wide theme: one stylesheet plus shared fonts and palettes.
+
+    The stylesheet is installed on the QApplication once and selects widgets by
+    their "role" property, so Qt parses it a single time instead of once per
+    widget. Fonts and palettes are built once per role and shared.
+    """
+    def __init__(self):
+        self.logger = setup_logger('theme_engine')
+        self._fonts = {}
+        self._palettes = {}
+        self._installed = False
+
+    def install(self, app=None):
+        """Add the theme stylesheet to the application's stylesheet (once)."""
+        if self._installed:
+            return
+        app = app or QApplication.instance()
+        if app is None:
+            return
+        app.setStyleSheet(app.styleSheet() + APP_STYLESHEET)
+        self._installed = True
+        self.logger.debug("Application stylesheet installed")
+
+    def font(self, role):
+        """Return the shared font for a role."""
+        font = self._fonts.get(role)
+        if font is None:
+            family, size = FONTS[role]
+            font = self._fonts[role] = QFont(family, size)
+        return font
+
+    def palette(self, role):
+        """Return the shared palette for a role."""
+        palette = self._palettes.get(role)
+        if palette is None:
+            palette = self._palettes[role] = QPalette()
+            for color_role, rgb in PALETTES[role].items():
+                palette.setColor(color_role, QColor(*rgb))
+        return palette
+
+    def apply(self, widget, role):
+        """
+        Give a widget a role: the matching stylesheet rules, font and palette.
+
+        Args:
+            widget (QWidget): The widget to style.
+            role (str): The role name.
+        """
+        self.install()
+        widget.setProperty('role', role)
+        if role in FONTS:
+            widget.setFont(self.font(role))
+        if role in PALETTES:
+            widget.setPalette(self.palette(role))
+        if widget.isVisible():
+            # Already polished: re-evaluate the property selectors
+            widget.style().unpolish(widget)
+            widget.style().polish(widget)
+
+
+_theme = None
+
+
+def get_theme():
+    """Return the application's theme engine."""
+    global _theme
+    if _theme is None:
+        _theme = ThemeEngine()
+    return _theme
@@ -1,24 +1,38 @@
-from PyQt5 import uic
-from PyQt5.QtWidgets import QWidget, QPushButton, QDoubleSpinBox, QStackedWidget
-from PyQt5.QtGui import QPalette, QColor
+from PyQt5.QtWidgets import QWidget, QPushButton, QDoubleSpinBox, QStackedWidget, QComboBox
 from utils.helpers import check_ui_elements
-from utils.logger import setup_logger
+from async_logging import setup_logger
 from utils import dialog
+from ui_cache import load_ui
+from navigation_router import back_to_calibration
+from gcode_dispatcher import get_dispatcher
+from tool_offsets import ToolOffsetMatrix
+from printer_state import get_printer_state
+from calibration_journal import get_calibration_journal
+from theme_engine import get_theme
+from startup_profiler import get_profiler
 class ToolOffset(QWidget):
     """
     Tool Offset configuration page that allows users to set the XY and Z offsets
-    between multiple extruders for dual-extruder printers.
+    between multiple extruders for dual-extruder and multi-toolhead printers.
     """
+    UI_FILE = '/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui/calibrate_screen/toolOffset/toolOffset.ui'
+
+    # Tools T0..T<TOOL_COUNT-1>; the Set buttons edit the selected tool
+    TOOL_COUNT = 2
+    DEFAULT_TOOL = 1
+
     def __init__(self, main_window):
         super(ToolOffset, self).__init__()
         self.main_window = main_window
+        self.selected_tool = self.DEFAULT_TOOL
         # Properly initialize logger with a distinct name
         self.logger = setup_logger('ToolOffset')
         self.logger.info("Initializing ToolOffset page")
 
         # Load the UI
         try:
-            uic.loadUi('/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui/calibrate_screen/toolOffset/toolOffset.ui', self)
+            with get_profiler().stage('loadUi', page='ToolOffset'):
+                load_ui(self.UI_FILE, self)
             self.logger.info("ToolOffset UI loaded successfully")
         except Exception as e:
             self.logger.error(f"Failed to load ToolOffset UI file: {e}")
@@ -46,24 +60,24 @@ class ToolOffset(QWidget):
             if spinbox:
                 spinbox.lineEdit().setReadOnly(True)
                 spinbox.lineEdit().setDisabled(True)
-                palette = QPalette()
-                palette.setColor(QPalette.Highlight, QColor(40, 40, 40))
-                spinbox.lineEdit().setPalette(palette)
+                with get_profiler().stage('stylesheet', page='ToolOffset'):
+                    get_theme().apply(spinbox.lineEdit(), 'offsetSpinBox')
 
     # Validate UI components
-        check_ui_elements(self, [
-            self.stackedWidget,
-            self.toolOffsetXYPage,
-            self.toolOffsetZPage,
-            self.toolOffsetXYBackButton,
-            self.toolOffsetZBackButton,
-            self.toolOffsetXSetButton,
-            self.toolOffsetYSetButton,
-            self.toolOffsetZSetButton,
-            self.toolOffsetXDoubleSpinBox,
-            self.toolOffsetYDoubleSpinBox,
-            self.toolOffsetZDoubleSpinBox
-        ], "ToolOffset Page")
+        with get_profiler().stage('check_ui_elements', page='ToolOffset'):
+            check_ui_elements(self, [
+                self.stackedWidget,
+                self.toolOffsetXYPage,
+                self.toolOffsetZPage,
+                self.toolOffsetXYBackButton,
+                self.toolOffsetZBackButton,
+                self.toolOffsetXSetButton,
+                self.toolOffsetYSetButton,
+                self.toolOffsetZSetButton,
+                self.toolOffsetXDoubleSpinBox,
+                self.toolOffsetYDoubleSpinBox,
+                self.toolOffsetZDoubleSpinBox
+            ], "ToolOffset Page")
 
     # Connect buttons to their respective methods
         if self.toolOffsetXYBackButton:
@@ -71,42 +85,110 @@ class ToolOffset(QWidget):
         if self.toolOffsetZBackButton:
             self.toolOffsetZBackButton.clicked.connect(self._return_to_main_calibration)
         if self.toolOffsetXSetButton:
-            self.toolOffsetXSetButton.clicked.connect(self.setToolOffsetX)
+            self.toolOffsetXSetButton.clicked.connect(lambda: self.setToolOffsetX(self.toolOffsetXDoubleSpinBox.value()))
         if self.toolOffsetYSetButton:
-            self.toolOffsetYSetButton.clicked.connect(self.setToolOffsetY)
+            self.toolOffsetYSetButton.clicked.connect(lambda: self.setToolOffsetY(self.toolOffsetYDoubleSpinBox.value()))
         if self.toolOffsetZSetButton:
-            self.toolOffsetZSetButton.clicked.connect(self.setToolOffsetY)
+            self.toolOffsetZSetButton.clicked.connect(lambda: self.setToolOffsetZ(self.toolOffsetZDoubleSpinBox.value()))
+
+        # Full per-tool offset matrix (same interface as NozzleOffsetPage's OffsetCoalescer);
+        # edits are merged into one batch of M218s, one M500 and one M503 read-back
+        self.printer_state = get_printer_state(self.main_window)
+        self.offset_coalescer = ToolOffsetMatrix(get_dispatcher(self.main_window), self.printer_state,
+                                                 tools=self.TOOL_COUNT, parent=self)
+        self.offset_coalescer.pendingChanged.connect(self._show_pending_offsets)
+        self.offset_coalescer.committed.connect(self._on_offsets_committed)
+        self.offset_coalescer.failed.connect(self._on_offsets_failed)
+        self.offset_coalescer.verificationFailed.connect(self._on_verification_failed)
+
+        # Start from the last offsets applied (journal), overridden by what the printer reported,
+        # and keep them current from the push stream
+        self.calibration_journal = get_calibration_journal(self.main_window)
+        for tool in range(1, self.TOOL_COUNT):
+            self.offset_coalescer.load({tool: self.calibration_journal.last_known('M218', tool)})
+        self.offset_coalescer.load(self.printer_state.tool_offsets)
+        self.printer_state.toolOffsetChanged.connect(self._on_tool_offset_changed)
+
+        # Optional tool selector for printers with more than two tools
+        self.toolOffsetToolComboBox = self.findChild(QComboBox, "toolOffsetToolComboBox")
+        if self.toolOffsetToolComboBox:
+            # T0 is the reference tool; its offset is always zero
+            self.toolOffsetToolComboBox.addItems([f"T{tool}" for tool in range(1, self.TOOL_COUNT)])
+            self.toolOffsetToolComboBox.setCurrentIndex(self.selected_tool - 1)
+            self.toolOffsetToolComboBox.currentIndexChanged.connect(lambda index: self.select_tool(index + 1))
+        self._show_selected_tool_offsets()
 
     def _return_to_main_calibration(self):
         """Return to the main calibration page"""
         self.logger.info("Returning to main calibration from tool offset page")
-        if hasattr(self.main_window, 'calibrate_screen'):
-            if hasattr(self.main_window.calibrate_screen, 'calibration_stacked_widget') and \
-               hasattr(self.main_window.calibrate_screen, 'main_calibrate_page'):
-                self.main_window.calibrate_screen.calibration_stacked_widget.setCurrentWidget(
-                    self.main_window.calibrate_screen.main_calibrate_page)
-                self.logger.debug("Successfully returned to main calibration page")
-            else:
-                self.logger.error("Cannot return to main calibration - required widgets not found")
-        else:
-            self.logger.error("Cannot return to main calibration - main_window.calibrate_screen not found")
+        # Don't hold back edits still in their settle window
+        self.offset_coalescer.flush()
+        if back_to_calibration(self.main_window):
+            self.logger.debug("Successfully returned to main calibration page")
+
+    def _show_current_offset(self, label_name, offset, pending=False):
+        """Update a current-offset label, if the UI has it."""
+        if hasattr(self, label_name):
+            suffix = " (pending)" if pending else ""
+            getattr(self, label_name).setText(f"{offset:.2f} mm{suffix}")
+
+    def _show_selected_tool_offsets(self):
+        """Show the selected tool's offsets (0 until known, as in the firmware), marking edits not saved yet."""
+        pending = self.offset_coalescer.pending_values().get(self.selected_tool, {})
+        for axis in 'XYZ':
+            offset = self.offset_coalescer.value(self.selected_tool, axis, 0.0)
+            self._show_current_offset(f"currentToolOffset{axis}Label", offset, pending=axis in pending)
+
+    def select_tool(self, tool):
+        """Make the Set buttons edit another tool's offsets."""
+        self.selected_tool = tool
+        self.logger.info(f"Editing offsets of tool T{tool}")
+        self._show_selected_tool_offsets()
+
+    def _show_pending_offsets(self, values):
+        """Show offsets that have not been saved to the printer yet."""
+        for axis, offset in values.get(self.selected_tool, {}).items():
+            self._show_current_offset(f"currentToolOffset{axis}Label", offset, pending=True)
+
+    def _on_offsets_committed(self, cells):
+        """Journal the offsets the printer saved and show them."""
+        for tool, values in cells.items():
+            self.calibration_journal.record_offsets('M218', tool, values)
+        self._show_selected_tool_offsets()
+
+    def _on_offsets_failed(self, e):
+        """Report offsets the printer did not accept and show the values still in effect."""
+        self._on_gcode_failed("setToolOffset", e)
+        self._show_selected_tool_offsets()
+
+    def _on_tool_offset_changed(self, tool, axis, offset):
+        """Show an offset reported by the printer unless a newer edit is still pending."""
+        if tool == self.selected_tool and axis not in self.offset_coalescer.pending_values().get(tool, {}):
+            self._show_current_offset(f"currentToolOffset{axis}Label", offset)
+
+    def _on_verification_failed(self, mismatches):
+        """Warn when the printer's settings report shows other offsets than the ones just saved."""
+        details = ", ".join(f"T{tool} {axis} {applied} (reported {reported})"
+                            for tool, axes in sorted(mismatches.items())
+                            for axis, (applied, reported) in sorted(axes.items()))
+        self._on_gcode_failed("setToolOffset", f"printer reported different offsets: {details}")
+
+    def _on_gcode_failed(self, method_name, e):
+        """Report a G-code command that failed in the background."""
+        self.logger.error(f"Error in {method_name}: {e}")
+        dialog.WarningOk(self, f"Error in {method_name}: {e}", overlay=True)
 
     def setToolOffsetX(self, x_offset):
         """Sets X offset for the tool and sends G-code commands to the 3D printer."""
         try:
             rounded_x_offset = round(float(x_offset), 2)
-            self.logger.info(f"Setting Tool X Offset to: {rounded_x_offset} mm")
+            self.logger.info(f"Setting Tool T{self.selected_tool} X Offset to: {rounded_x_offset} mm")
 
-            # Send G-code commands to configure tool offset
-            self.main_window.octoprint_client.gcode(command=f'M218 T1 X{rounded_x_offset}')  # Set X offset for tool
-            self.main_window.octoprint_client.gcode(command='M500')  # Save EEPROM settings
+            # Set X offset of the selected tool; rapid presses are merged into one batch and one EEPROM save
+            self.offset_coalescer.set(self.selected_tool, 'X', rounded_x_offset)
 
             # Reset spin box after setting the value
             self.toolOffsetXDoubleSpinBox.setValue(0)
-
-            # If there's a label for displaying the current X offset, update it
-            if hasattr(self, "currentToolOffsetXLabel"):
-                self.currentToolOffsetXLabel.setText(f"{rounded_x_offset:.2f} mm")
         except Exception as e:
             self.logger.error(f"Error in setToolOffsetX: {e}")
             dialog.WarningOk(self, f"Error in setToolOffsetX: {e}", overlay=True)
@@ -115,18 +197,13 @@ class ToolOffset(QWidget):
         """Sets Y offset for the tool and sends G-code commands to the 3D printer."""
         try:
             rounded_y_offset = round(float(y_offset), 2)
-            self.logger.info(f"Setting Tool Y Offset to: {rounded_y_offset} mm")
+            self.logger.info(f"Setting Tool T{self.selected_tool} Y Offset to: {rounded_y_offset} mm")
 
-            # Send G-code commands to configure tool offset
-            self.main_window.octoprint_client.gcode(command=f'M218 T1 Y{rounded_y_offset}')  # Set Y offset for tool
-            self.main_window.octoprint_client.gcode(command='M500')  # Save EEPROM settings
+            # Set Y offset of the selected tool; rapid presses are merged into one batch and one EEPROM save
+            self.offset_coalescer.set(self.selected_tool, 'Y', rounded_y_offset)
 
             # Reset spin box after setting the value
             self.toolOffsetYDoubleSpinBox.setValue(0)
-
-            # If there's a label for displaying the current Y offset, update it
-            if hasattr(self, "currentToolOffsetYLabel"):
-                self.currentToolOffsetYLabel.setText(f"{rounded_y_offset:.2f} mm")
         except Exception as e:
             self.logger.error(f"Error in setToolOffsetY: {e}")
             dialog.WarningOk(self, f"Error in setToolOffsetY: {e}", overlay=True)
@@ -136,18 +213,13 @@ class ToolOffset(QWidget):
         """Sets Z offset for the tool and sends G-code commands to the 3D printer."""
         try:
             rounded_z_offset = round(float(z_offset), 2)
-            self.logger.info(f"Setting Tool Z Offset to: {rounded_z_offset} mm")
+            self.logger.info(f"Setting Tool T{self.selected_tool} Z Offset to: {rounded_z_offset} mm")
 
-            # Send G-code commands to configure tool offset
-            self.main_window.octoprint_client.gcode(command=f'M218 T1 Z{rounded_z_offset}')  # Set Z offset for tool
-            self.main_window.octoprint_client.gcode(command='M500')  # Save EEPROM settings
+            # Set Z offset of the selected tool; rapid presses are merged into one batch and one EEPROM save
+            self.offset_coalescer.set(self.selected_tool, 'Z', rounded_z_offset)
 
             # Reset spin box after setting the value
             self.toolOffsetZDoubleSpinBox.setValue(0)
-
-            # If there's a label for displaying the current Z offset, update it
-            if hasattr(self, "currentToolOffsetZLabel"):
-                self.currentToolOffsetZLabel.setText(f"{rounded_z_offset:.2f} mm")
         except Exception as e:
             self.logger.error(f"Error in setToolOffsetZ: {e}")
             dialog.WarningOk(self, f"Error in setToolOffsetZ: {e}", overlay=True)
@@ -0,0 +1,235 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from async_logging import setup_logger
+
+AXES = 'XYZ'
+
+# Largest difference between an applied and a reported offset that still counts as equal
+# (M503 reports tool offsets with two or three decimals)
+TOLERANCE = 0.0051
+
+
+class ToolOffsetMatrix(QObject):
+    """
+    Per-tool X/Y/Z offsets (M218), with batched writes and read-back verification.
+
+    Edits to any cells are held for a settle window; then every changed tool
+    gets one "M218 T<n> ..." command carrying its changed axes, followed by a
+    single M500 and a single M503, all in one batch. The M503 report arriving
+    through the printer-state cache is compared with the applied values; only
+    a report showing different values is a failure. No report at all leaves
+    the cells unverified (e.g. when the client offers no push stream).
+
+    Offsets are mappings of {tool: {axis: value}}. As in the firmware, T0 is
+    the reference tool with a fixed zero offset, so the cells are T1..T<tools-1>.
+
+    The signals, pending_values(), flush(), settle_ms and writes_saved match
+    OffsetCoalescer, so pages and benchmarks drive both the same way.
+    """
+    # every cell not yet confirmed by the printer
+    pendingChanged = pyqtSignal(dict)
+    # the cells the printer accepted (offset commands and M500 succeeded)
+    committed = pyqtSignal(dict)
+    # the exception raised while sending
+    failed = pyqtSignal(object)
+    # the committed cells, once the M503 report matched them
+    verified = pyqtSignal(dict)
+    # {tool: {axis: (applied, reported)}} for cells the printer reported with another value
+    verificationFailed = pyqtSignal(dict)
+
+    SETTLE_MS = 1000
+    VERIFY_TIMEOUT_MS = 5000
+
+    def __init__(self, dispatcher, printer_state, tools=2, settle_ms=SETTLE_MS, parent=None):
+        """
+        Args:
+            dispatcher (GcodeDispatcher): Dispatcher used to send the batch.
+            printer_state (PrinterStateCache): Source of the M503 read-back.
+            tools (int): Number of tools, including the reference tool T0.
+            settle_ms (int): How long to wait after the last edit before sending.
+            parent (QObject, optional): Qt parent.
+        """
+        super(ToolOffsetMatrix, self).__init__(parent)
+        self.dispatcher = dispatcher
+        self.printer_state = printer_state
+        self.tools = tools
+        self.logger = setup_logger('tool_offsets')
+
+        # Last values known to be on the printer, and edits not sent / sent but not confirmed
+        self.offsets = {tool: {} for tool in range(1, tools)}
+        self._pending = {}
+        self._in_flight = {}
+        self._verifying = {}
+        # Values the printer reported for cells being verified that did not match
+        self._mismatched = {}
+        self._committed_unverified = False
+
+        # Printer writes avoided by merging edits (each merged edit saves an offset command and an M500)
+        self.writes_saved = 0
+
+        self.printer_state.toolOffsetReported.connect(self._on_reported)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(settle_ms)
+        self._timer.timeout.connect(self.flush)
+
+        self._verify_timer = QTimer(self)
+        self._verify_timer.setSingleShot(True)
+        self._verify_timer.setInterval(self.VERIFY_TIMEOUT_MS)
+        self._verify_timer.timeout.connect(self._verification_timed_out)
+
+    @property
+    def settle_ms(self):
+        """How long edits are held after the last one before they are sent."""
+        return self._timer.interval()
+
+    @settle_ms.setter
+    def settle_ms(self, settle_ms):
+        self._timer.setInterval(settle_ms)
+
+    def load(self, offsets):
+        """Set known offsets without sending anything (e.g. from the printer state or journal)."""
+        for tool, values in offsets.items():
+            if 1 <= tool < self.tools:
+                self.offsets[tool].update(values)
+
+    def value(self, tool, axis, default=None):
+        """Return the newest value of a cell: pending edit, else in flight, else known."""
+        for source in (self._pending, self._in_flight, self.offsets):
+            value = source.get(tool, {}).get(axis)
+            if value is not None:
+                return value
+        return default
+
+    def set(self, tool, axis, value):
+        """
+        Edit one cell and restart the settle window.
+
+        Args:
+            tool (int): The tool, 1..tools-1.
+            axis (str): "X", "Y" or "Z".
+            value (float): The new offset.
+        """
+        if not 1 <= tool < self.tools or axis not in AXES:
+            raise ValueError(f"No offset cell for tool {tool}, axis {axis}")
+        if self._pending:
+            # Without coalescing this edit would have been its own offset command and M500
+            self.writes_saved += 2
+        self._pending.setdefault(tool, {})[axis] = value
+        self._timer.start()
+        self.pendingChanged.emit(self.pending_values())
+
+    def set_many(self, cells):
+        """Edit several cells at once ({tool: {axis: value}})."""
+        for tool, values in cells.items():
+            for axis, value in values.items():
+                self.set(tool, axis, value)
+
+    def pending_values(self):
+        """Return every cell not yet confirmed by the printer, newest edits first."""
+        values = {tool: dict(axes) for tool, axes in self._in_flight.items()}
+        for tool, axes in self._pending.items():
+            values.setdefault(tool, {}).update(axes)
+        return values
+
+    def commands(self, cells):
+        """Return the batch applying cells: one M218 per tool, then M500 and M503."""
+        commands = []
+        for tool in sorted(cells):
+            arguments = ' '.join(f'{axis}{cells[tool][axis]}' for axis in AXES if axis in cells[tool])
+            commands.append(f'M218 T{tool} {arguments}')
+        return commands + ['M500', 'M503']
+
+    def flush(self):
+        """Send the pending edits now instead of waiting for the settle window."""
+        self._timer.stop()
+        if not self._pending:
+            return
+
+        cells, self._pending = self._pending, {}
+        for tool, axes in cells.items():
+            self._in_flight.setdefault(tool, {}).update(axes)
+            # The report may be parsed before the batch's own reply arrives
+            self._verifying.setdefault(tool, {}).update(axes)
+        batch = self.commands(cells)
+        self.logger.info(f"Applying tool offsets: {' | '.join(batch)} ({self.writes_saved} writes saved so far)")
+        self.dispatcher.send_batch(
+            batch,
+            on_success=lambda _: self._on_committed(cells),
+            on_failure=lambda e: self._on_failed(cells, e))
+
+    def _forget_in_flight(self, cells):
+        for tool, axes in cells.items():
+            in_flight = self._in_flight.get(tool, {})
+            for axis, value in axes.items():
+                if in_flight.get(axis) == value:
+                    del in_flight[axis]
+            if not in_flight:
+                self._in_flight.pop(tool, None)
+
+    def _on_committed(self, cells):
+        self._forget_in_flight(cells)
+        for tool, axes in cells.items():
+            self.offsets[tool].update(axes)
+        self._committed_unverified = True
+        self.committed.emit(cells)
+        self.pendingChanged.emit(self.pending_values())
+        if self._verifying:
+            self._verify_timer.start()
+        else:
+            self._on_verified()
+
+    def _on_failed(self, cells, e):
+        self._forget_in_flight(cells)
+        for tool, axes in cells.items():
+            verifying = self._verifying.get(tool, {})
+            for axis in axes:
+                verifying.pop(axis, None)
+                self._mismatched.get(tool, {}).pop(axis, None)
+            if not verifying:
+                self._verifying.pop(tool, None)
+        self.failed.emit(e)
+        self.pendingChanged.emit(self.pending_values())
+
+    def _on_reported(self, tool, axis, value):
+        """Check a value from the printer's settings report against the applied cells."""
+        if not 1 <= tool < self.tools:
+            return
+        self.offsets[tool][axis] = value
+        expected = self._verifying.get(tool, {}).get(axis)
+        if expected is None:
+            return
+        if abs(expected - value) > TOLERANCE:
+            # Possibly a report older than the batch; only counts if no matching one follows
+            self._mismatched.setdefault(tool, {})[axis] = value
+            return
+        self._mismatched.get(tool, {}).pop(axis, None)
+        del self._verifying[tool][axis]
+        if not self._verifying[tool]:
+            del self._verifying[tool]
+        if not self._verifying and self._committed_unverified:
+            self._on_verified()
+
+    def _on_verified(self):
+        self._verify_timer.stop()
+        self._committed_unverified = False
+        self.logger.info("Tool offsets verified by M503 read-back")
+        self.verified.emit({tool: dict(axes) for tool, axes in self.offsets.items()})
+
+    def _verification_timed_out(self):
+        mismatches, unreported = {}, {}
+        for tool, axes in self._verifying.items():
+            for axis, expected in axes.items():
+                reported = self._mismatched.get(tool, {}).get(axis)
+                if reported is None:
+                    unreported.setdefault(tool, {})[axis] = expected
+                else:
+                    mismatches.setdefault(tool, {})[axis] = (expected, reported)
+        self._verifying = {}
+        self._mismatched = {}
+        self._committed_unverified = False
+        if unreported:
+            self.logger.warning(f"Tool offsets saved but not reported back by the printer (unverified): {unreported}")
+        if mismatches:
+            self.logger.error(f"Printer reported other tool offsets than applied: {mismatches}")
+            self.verificationFailed.emit(mismatches)
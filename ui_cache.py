@@ -0,0 +1,348 @@
+"""
+Compiled cache for Qt Designer .ui files.
+
+uic.loadUi parses and interprets the Designer XML every time a screen is
+built. This module compiles each .ui file once with uic.compileUi, stores the
+resulting bytecode under a key derived from the file contents, and on later
+boots executes the cached code object directly. Editing a .ui file changes its
+hash, so stale entries are never used.
+
+Compiling never happens on the GUI thread. When a screen loads a .ui file
+that is not cached yet (first boot, or after an update), that boot parses the
+XML with uic.loadUi and a background process compiles every .ui file under
+UI_ROOT for the next one. Files can also be compiled ahead of time, at install
+time, in a worker process pool:
+
+    python ui_cache.py /path/to/octoprint_ControlCenter/ui
+    python ui_cache.py --measure /path/to/octoprint_ControlCenter/ui
+    python ui_cache.py --serial /path/to/octoprint_ControlCenter/ui    (one process, as the warm-up runs)
+"""
+import os
+import io
+import re
+import sys
+import time
+import marshal
+import hashlib
+import importlib.util
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5 import uic
+from PyQt5.QtCore import PYQT_VERSION_STR
+from async_logging import setup_logger
+
+logger = setup_logger('ui_cache')
+
+CACHE_DIR = os.environ.get(
+    'CONTROLCENTER_UI_CACHE',
+    os.path.expanduser('~/.cache/octoprint_ControlCenter/ui'))
+
+# Compiled in the background the first time a boot finds the cache cold
+UI_ROOT = '/home/pi/OctoPrint/venv/lib/python3.7/site-packages/octoprint_ControlCenter/ui'
+
+# uic resolves relative icon/pixmap paths against the .ui directory only when
+# loading dynamically; compiled code would resolve them against the cwd.
+_RELATIVE_RESOURCE = re.compile(
+    rb'<(?:pixmap|normaloff|normalon|disabledoff|disabledon|activeoff|activeon|selectedoff|selectedon)>\s*(?!:)')
+
+# Code objects already loaded in this process, keyed by content hash
+_code_cache = {}
+
+# Load time of the last load_ui call per .ui file: (seconds, used_cache)
+stats = {}
+
+# Background compile process started by this boot, if any
+_warm_up_process = None
+
+
+def ui_digest(data):
+    """
+    Hash .ui contents together with the PyQt and bytecode versions.
+
+    Args:
+        data (bytes): The raw contents of the .ui file.
+
+    Returns:
+        str: The hex digest used as the cache key.
+    """
+    digest = hashlib.sha1(data)
+    digest.update(PYQT_VERSION_STR.encode())
+    digest.update(importlib.util.MAGIC_NUMBER)
+    return digest.hexdigest()
+
+
+def cache_path(ui_file, digest, cache_dir=None):
+    """Return the path of the cached bytecode for a .ui file."""
+    name = os.path.splitext(os.path.basename(ui_file))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f'{name}-{digest}.pyc')
+
+
+def is_cacheable(data):
+    """Return False for .ui files whose relative resource paths only resolve with uic.loadUi."""
+    return _RELATIVE_RESOURCE.search(data) is None
+
+
+def compile_ui(ui_file, cache_dir=None):
+    """
+    Compile a .ui file to bytecode in the cache, unless it is already there.
+
+    Args:
+        ui_file (str): The path to the .ui file.
+        cache_dir (str, optional): Override for the cache directory.
+
+    Returns:
+        str: The path to the cached bytecode, or None if the file cannot be cached.
+    """
+    with open(ui_file, 'rb') as f:
+        data = f.read()
+    if not is_cacheable(data):
+        return None
+
+    path = cache_path(ui_file, ui_digest(data), cache_dir)
+    if os.path.exists(path):
+        return path
+
+    source = io.StringIO()
+    uic.compileUi(ui_file, source)
+    code = compile(source.getvalue(), ui_file, 'exec')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(importlib.util.MAGIC_NUMBER)
+        marshal.dump(code, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_code(ui_file, cache_dir=None):
+    """
+    Return the compiled code object for a .ui file.
+
+    Returns None if the file cannot be cached or is not compiled yet; in the
+    latter case a background compile is started (see warm_up).
+    """
+    with open(ui_file, 'rb') as f:
+        data = f.read()
+    if not is_cacheable(data):
+        return None
+
+    digest = ui_digest(data)
+    code = _code_cache.get(digest)
+    if code is not None:
+        return code
+
+    path = cache_path(ui_file, digest, cache_dir)
+    if not os.path.exists(path):
+        logger.info(f"{os.path.basename(ui_file)} not in the UI cache yet, parsing XML this time")
+        warm_up([ui_file, UI_ROOT], cache_dir)
+        return None
+    with open(path, 'rb') as f:
+        if f.read(len(importlib.util.MAGIC_NUMBER)) != importlib.util.MAGIC_NUMBER:
+            raise ValueError(f"Stale UI cache entry: {path}")
+        code = marshal.load(f)
+    _code_cache[digest] = code
+    return code
+
+
+def load_ui(ui_file, baseinstance, cache_dir=None):
+    """
+    Drop-in replacement for uic.loadUi(ui_file, baseinstance) backed by the cache.
+
+    Named child widgets are set as attributes on baseinstance, as uic.loadUi
+    does. Falls back to uic.loadUi if the file cannot be cached, is not cached
+    yet, or the cached code fails to run.
+
+    Args:
+        ui_file (str): The path to the .ui file.
+        baseinstance (QWidget): The widget to set the UI up on.
+        cache_dir (str, optional): Override for the cache directory.
+
+    Returns:
+        QWidget: baseinstance.
+    """
+    start = time.perf_counter()
+    ui = None
+    try:
+        code = _load_code(ui_file, cache_dir)
+        if code is not None:
+            namespace = {'__name__': 'ui_cache_compiled'}
+            exec(code, namespace)
+            ui_class = next(value for key, value in namespace.items() if key.startswith('Ui_'))
+            ui = ui_class()
+            ui.setupUi(baseinstance)
+    except Exception as e:
+        logger.warning(f"UI cache unavailable for {ui_file}, parsing XML instead: {e}")
+        ui = None
+
+    if ui is None:
+        uic.loadUi(ui_file, baseinstance)
+    else:
+        for name, value in vars(ui).items():
+            setattr(baseinstance, name, value)
+
+    elapsed = time.perf_counter() - start
+    stats[ui_file] = (elapsed, ui is not None)
+    logger.debug("Loaded %s in %.1f ms (cached: %s)", os.path.basename(ui_file), elapsed * 1000, ui is not None)
+    return baseinstance
+
+
+def find_ui_files(paths):
+    """Expand files and directories into the list of .ui files they contain."""
+    ui_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                ui_files.extend(os.path.join(root, name) for name in files if name.endswith('.ui'))
+        elif path.endswith('.ui'):
+            ui_files.append(path)
+    return sorted(ui_files)
+
+
+def precompile(ui_files, cache_dir=None, workers=None):
+    """
+    Compile .ui files into the cache in a pool of worker processes.
+
+    Args:
+        ui_files (list): Paths to .ui files.
+        cache_dir (str, optional): Override for the cache directory.
+        workers (int, optional): Number of worker processes.
+
+    Returns:
+        dict: Maps each .ui file to its cache path, None if uncacheable,
+        or the exception raised while compiling it.
+    """
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {ui_file: pool.submit(compile_ui, ui_file, cache_dir) for ui_file in ui_files}
+        for ui_file, future in futures.items():
+            try:
+                results[ui_file] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to compile {ui_file}: {e}")
+                results[ui_file] = e
+    return results
+
+
+def _compile_serially(paths, cache_dir=None):
+    """Compile the .ui files under paths one after another, logging failures (background worker body)."""
+    for ui_file in find_ui_files(paths):
+        try:
+            compile_ui(ui_file, cache_dir)
+        except Exception as e:
+            logger.error(f"Failed to compile {ui_file}: {e}")
+
+
+def start_background_precompile(paths, cache_dir=None):
+    """
+    Compile .ui files in a separate process without waiting for it.
+
+    The worker is this module run as a script ("--serial"), so it does not
+    re-import the application's main module the way a multiprocessing child would.
+
+    Args:
+        paths (list): .ui files and directories to search for them.
+        cache_dir (str, optional): Override for the cache directory.
+
+    Returns:
+        subprocess.Popen: The started worker process.
+    """
+    env = dict(os.environ)
+    if cache_dir:
+        env['CONTROLCENTER_UI_CACHE'] = cache_dir
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serial'] + list(paths),
+                            env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+
+
+def warm_up(paths, cache_dir=None):
+    """
+    Start compiling the .ui files under paths in the background, at most once per boot.
+
+    Called by load_ui when it finds the cache cold; the screens of this boot
+    keep parsing XML, later boots load the compiled code.
+
+    Returns:
+        subprocess.Popen: The worker process, or None if it could not be started.
+    """
+    global _warm_up_process
+    if _warm_up_process is None:
+        try:
+            _warm_up_process = start_background_precompile(paths, cache_dir)
+            logger.info(f"Compiling UI files in the background (pid {_warm_up_process.pid})")
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"Could not start background UI compile: {e}")
+            # Don't retry on every cold load of this boot
+            _warm_up_process = False
+    return _warm_up_process or None
+
+
+def measure(ui_file, repeat=5, cache_dir=None):
+    """
+    Compare uic.loadUi against the cached load for one .ui file.
+
+    A QApplication must exist. Each run builds a fresh QWidget; the in-process
+    code cache is cleared so every cached run reads the bytecode from disk,
+    as a fresh boot would.
+
+    Returns:
+        dict: Best-of-N load times in milliseconds for 'loadUi' and 'cached', and 'saved'.
+    """
+    from PyQt5.QtWidgets import QWidget
+
+    compile_ui(ui_file, cache_dir)
+
+    def best(load):
+        times = []
+        for _ in range(repeat):
+            widget = QWidget()
+            start = time.perf_counter()
+            load(widget)
+            times.append(time.perf_counter() - start)
+            widget.deleteLater()
+        return min(times) * 1000
+
+    def cached_load(widget):
+        _code_cache.clear()
+        load_ui(ui_file, widget, cache_dir)
+
+    xml_ms = best(lambda widget: uic.loadUi(ui_file, widget))
+    cached_ms = best(cached_load)
+    return {'loadUi': xml_ms, 'cached': cached_ms, 'saved': xml_ms - cached_ms}
+
+
+def main(argv):
+    """Command line entry point: precompile, and optionally measure, .ui files."""
+    do_measure = '--measure' in argv
+    paths = [arg for arg in argv if not arg.startswith('--')]
+    if '--serial' in argv:
+        _compile_serially(paths)
+        return 0
+    ui_files = find_ui_files(paths)
+    if not ui_files:
+        print("usage: ui_cache.py [--measure | --serial] <ui file or directory>...")
+        return 1
+
+    results = precompile(ui_files)
+    for ui_file, result in results.items():
+        status = 'error' if isinstance(result, Exception) else ('skipped' if result is None else 'cached')
+        print(f"{status:8} {ui_file}")
+
+    if do_measure:
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        total_saved = 0.0
+        print(f"{'page':40} {'loadUi ms':>10} {'cached ms':>10} {'saved ms':>10}")
+        for ui_file, result in results.items():
+            if not result or isinstance(result, Exception):
+                continue
+            timing = measure(ui_file)
+            total_saved += timing['saved']
+            print(f"{os.path.basename(ui_file):40} {timing['loadUi']:10.1f} {timing['cached']:10.1f} {timing['saved']:10.1f}")
+        print(f"{'total':40} {'':10} {'':10} {total_saved:10.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))